@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""Per-job crew construction time, cold versus with the cached blueprint.
+
+"cold" clears the config, tool and agent caches before every build, which is
+what each job paid before the blueprint was cached (the old @task context
+calls rebuilt agents and tools several more times on top of that)::
+
+    python -m benchmarks.crew_construction --jobs 20
+"""
+import argparse
+import statistics
+import time
+
+from recruitment import crew as crew_module
+from recruitment.crew import PharmacyTechnicianCrew
+
+
+def reset_blueprint():
+    crew_module.load_config.cache_clear()
+    crew_module.shared_tools.cache_clear()
+    crew_module._thread_agents.__dict__.clear()
+
+
+def measure(jobs, cold):
+    samples = []
+    for _ in range(jobs):
+        if cold:
+            reset_blueprint()
+        start = time.perf_counter()
+        PharmacyTechnicianCrew().crew()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, cold in (("cold (per-job rebuild)", True), ("cached blueprint", False)):
+        samples = measure(args.jobs, cold)
+        print(f"{name:<24} median {statistics.median(samples) * 1000:8.2f} ms   max {max(samples) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
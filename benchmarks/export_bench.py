@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""Throughput of the streaming candidate export.
+
+Start the API (``python main.py``) against a populated database (see
+``facet_search_bench.py --seed``), then run::
+
+    python -m benchmarks.export_bench --base-url http://localhost:8000
+
+Downloads the export in each format, decompressing on the fly, and reports
+rows/s, bytes on the wire and time to first byte. Watch the API process's
+RSS while it runs: it should stay flat however large the table is.
+"""
+import argparse
+import time
+import zlib
+from http.client import HTTPConnection
+from urllib.parse import urlparse
+
+VARIANTS = [("csv", False), ("csv", True), ("ndjson", False), ("ndjson", True)]
+
+
+def download(base_url, export_format, gzip):
+    url = urlparse(base_url)
+    conn = HTTPConnection(url.hostname, url.port or 80, timeout=600)
+    start = time.perf_counter()
+    conn.request("GET", f"/api/candidates/export?format={export_format}&gzip={str(gzip).lower()}")
+    response = conn.getresponse()
+    if response.status != 200:
+        raise SystemExit(f"HTTP {response.status}: {response.read()[:200]!r}")
+    decompressor = zlib.decompressobj(wbits=31) if gzip else None
+    first_byte = None
+    wire_bytes = lines = 0
+    while True:
+        chunk = response.read(64 * 1024)
+        if not chunk:
+            break
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        wire_bytes += len(chunk)
+        lines += (decompressor.decompress(chunk) if decompressor else chunk).count(b"\n")
+    elapsed = time.perf_counter() - start
+    conn.close()
+    rows = lines - 1 if export_format == "csv" else lines
+    return rows, wire_bytes, first_byte or elapsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    args = parser.parse_args()
+
+    print(f"{'variant':<14} {'rows':>10} {'MB':>9} {'first byte':>11} {'seconds':>9} {'rows/s':>10}")
+    for export_format, gzip in VARIANTS:
+        rows, wire_bytes, first_byte, elapsed = download(args.base_url, export_format, gzip)
+        name = export_format + (" + gzip" if gzip else "")
+        print(f"{name:<14} {rows:>10} {wire_bytes / 1e6:>9.1f} {first_byte * 1000:>9.0f}ms "
+              f"{elapsed:>9.2f} {rows / elapsed:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Micro-benchmark for the profile attribute extractor.
+
+Compares the single-pass compiled extractor against the previous approach
+(four keyword scans per headline, run once for ingestion and again for
+formatting) over a synthetic corpus of LinkedIn-style headlines::
+
+    python -m benchmarks.extractor_bench --size 100000
+"""
+import argparse
+import random
+import re
+import time
+
+from recruitment.tools.extractor import (
+    CERTIFICATION_KEYWORDS, DEFAULT_SKILLS, SKILL_KEYWORDS, WORKPLACE_KEYWORDS, extract, extract_many
+)
+
+ROLES = ["Pharmacy Technician", "Certified Pharmacy Technician", "Lead Pharmacy Tech", "Senior Pharmacy Technician",
+         "IV Technician", "Pharmacy Technician II", "Compounding Technician", "Pharmacy Intern"]
+QUALIFIERS = ["CPhT", "PTCB", "ExCPT", "NHA certified", "", "", ""]
+EMPLOYERS = ["CVS Health", "Walgreens", "Rite Aid", "Walmart", "Kaiser Permanente", "Mayo Clinic",
+             "St. Mary's Hospital", "Omnicare LTC", "independent retail pharmacy", "long-term care pharmacy"]
+EXTRAS = ["", "", "5 years experience", "10+ yrs", "sterile compounding", "inventory & billing",
+          "customer service", "EMR specialist"]
+
+
+def build_corpus(size, unique_ratio, seed=0):
+    rng = random.Random(seed)
+    unique = [
+        " ".join(filter(None, [rng.choice(ROLES), rng.choice(QUALIFIERS), "at", rng.choice(EMPLOYERS),
+                               rng.choice(EXTRAS), f"#{i}"]))
+        for i in range(max(1, int(size * unique_ratio)))
+    ]
+    return [rng.choice(unique) for _ in range(size)]
+
+
+def reference_extract(position):
+    """The previous per-table substring scans, kept here for comparison"""
+    experience = "Not specified"
+    match = re.search(r'(\d+)\s*(?:year|yr|years)', position.lower())
+    if match:
+        experience = f"{match.group(1)} years of experience"
+    certifications = [v for k, v in CERTIFICATION_KEYWORDS.items() if k.lower() in position.lower()]
+    skills = [v for k, v in SKILL_KEYWORDS.items() if k.lower() in position.lower()] or DEFAULT_SKILLS
+    workplaces = [v for k, v in WORKPLACE_KEYWORDS.items() if k.lower() in position.lower()]
+    return (experience, ", ".join(certifications) or "Not specified", ", ".join(skills),
+            ", ".join(workplaces) or "Not specified")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--unique-ratio", type=float, default=0.3,
+                        help="fraction of distinct headlines in the corpus")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size, args.unique_ratio)
+
+    for text in corpus[:1000]:
+        attrs = extract(text)
+        assert reference_extract(text) == (attrs.experience, attrs.certifications, attrs.skills, attrs.workplace)
+
+    results = {}
+    results["previous (ingest + format)"] = timed(lambda: [reference_extract(t) for t in corpus * 2])
+    extract.cache_clear()
+    results["compiled, cold cache"] = timed(lambda: extract_many(corpus))
+    results["compiled, warm cache"] = timed(lambda: extract_many(corpus))
+
+    print(f"{args.size} headlines, {len(set(corpus))} distinct")
+    for name, seconds in results.items():
+        print(f"{name:<28} {seconds * 1000:>9.1f} ms  {args.size / seconds:>12,.0f} headlines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Latency of the faceted candidate search queries.
+
+Optionally seeds synthetic candidates, then times ``search_candidates`` and
+``get_search_facets`` directly against the database (no query cache) for a
+set of typical filter combinations. Point POSTGRES_* at a scratch database::
+
+    python -m recruitment.migrate
+    python -m benchmarks.facet_search_bench --seed 1000000 --runs 20
+"""
+import argparse
+import random
+import statistics
+import time
+
+from .extractor_bench import build_corpus
+from .scoring_bench import LOCATIONS
+
+from recruitment.tools.database import Database
+from recruitment.tools.extractor import extract, profile_tags
+from recruitment.tools.scoring import location_state
+
+QUERIES = {
+    "no filters": {},
+    "cpht": {"certifications": ("cpht",)},
+    "ptcb + sterile": {"certifications": ("ptcb",), "skills": ("sterile",)},
+    "hospital in TX, score >= 7": {"workplaces": ("hospital",), "states": ("TX",), "min_score": 7},
+    "text 'compounding'": {"query": "compounding"},
+    "text + cert + state": {"query": "retail", "certifications": ("cpht",), "states": ("FL", "TX")},
+}
+
+
+def seed(count, batch=5000):
+    rng = random.Random(1)
+    corpus = build_corpus(count, 0.3, seed=1)
+    with Database() as db:
+        for start in range(0, count, batch):
+            rows = []
+            for i in range(start, min(start + batch, count)):
+                attrs = extract(corpus[i])
+                tags = profile_tags(attrs)
+                location = rng.choice(LOCATIONS)
+                rows.append({
+                    "name": f"Candidate {i}", "position": corpus[i], "location": location,
+                    "profile_link": f"https://www.linkedin.com/in/bench-{i}",
+                    "experience": attrs.experience, "certifications": attrs.certifications,
+                    "skills": attrs.skills, "workplace": attrs.workplace,
+                    "certification_tags": tags.certifications, "skill_tags": tags.skills,
+                    "workplace_tags": tags.workplaces, "location_state": location_state(location),
+                })
+            ids = db.upsert_candidates(rows)
+            db.update_scores((cid, rng.randint(10, 100) / 10, "rules") for cid in ids.values())
+        db.cursor.execute("ANALYZE candidates; ANALYZE candidate_details")
+        db.conn.commit()
+
+
+def timed_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(0.99 * len(samples)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="synthetic candidates to insert first")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.seed:
+        start = time.perf_counter()
+        seed(args.seed)
+        print(f"seeded {args.seed} candidates in {time.perf_counter() - start:.1f}s")
+
+    with Database() as db:
+        db.cursor.execute("SELECT count(*) AS count FROM candidate_details")
+        print(f"{db.cursor.fetchone()['count']} candidates; p50 / p99 in ms over {args.runs} runs")
+        print(f"{'filters':<30} {'page':>15} {'facets':>15}")
+        for name, filters in QUERIES.items():
+            page = timed_ms(lambda: db.search_candidates(20, **filters), args.runs)
+            facets = timed_ms(lambda: db.get_search_facets(**filters), args.runs)
+            print(f"{name:<30} {page[0]:>7.1f} /{page[1]:>6.1f} {facets[0]:>7.1f} /{facets[1]:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Latency under concurrency for the read endpoints.
+
+Start the API (``python main.py``) against a populated database, then run::
+
+    python -m benchmarks.load_test --base-url http://localhost:8000 --requests 500
+
+Run it once on a checkout before the async data-access change and once after
+to compare p50/p99 at 1, 10 and 100 concurrent clients.
+
+No gain has been measured yet. The only run so far put the API,
+PostgreSQL and this client on a single vCPU; there the test is CPU-bound
+and before/after results were within noise, so they say nothing about
+the change. The effect to look for is the event loop staying responsive
+while queries wait on the database, which needs spare cores and a
+database that is not starved by the client; measure on such a host.
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from urllib.parse import urlparse
+
+ENDPOINTS = [
+    "/api/candidates?limit=100",
+    "/api/candidates/top?limit=10",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_level(base_url, path, concurrency, total_requests):
+    url = urlparse(base_url)
+    local = threading.local()
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one_request(_):
+        nonlocal errors
+        # One keep-alive connection per client thread
+        if not hasattr(local, "conn"):
+            local.conn = HTTPConnection(url.hostname, url.port or 80, timeout=60)
+        start = time.perf_counter()
+        try:
+            local.conn.request("GET", path)
+            response = local.conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except OSError:
+            local.conn.close()
+            del local.conn
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_request, range(total_requests)))
+    wall = time.perf_counter() - started
+    return latencies, errors, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<32} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for path in ENDPOINTS:
+        for concurrency in args.concurrency:
+            latencies, errors, wall = run_level(args.base_url, path, concurrency, args.requests)
+            if not latencies:
+                print(f"{path:<32} {concurrency:>7} {'-':>8} {'-':>8} {'-':>8} {errors:>6}")
+                continue
+            print(
+                f"{path:<32} {concurrency:>7} {len(latencies) / wall:>8.1f} "
+                f"{statistics.median(latencies) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} {errors:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
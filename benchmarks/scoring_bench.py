@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Benchmark for the rubric pre-scoring engine.
+
+Scores a synthetic corpus of extracted profiles in batches, compares the
+array-based engine with a per-candidate loop, and reports how many
+candidates would still go to the LLM analyzer::
+
+    python -m benchmarks.scoring_bench --size 100000 --batch 500
+"""
+import argparse
+import random
+import time
+
+from .extractor_bench import build_corpus
+
+from recruitment.tools.extractor import extract_many
+from recruitment.tools.scoring import (
+    CERTIFICATION_POINTS, EXPERIENCE_BRACKETS, LOCATION_US, MAX_SKILL_POINTS, US_LOCATION_POINTS,
+    WORKPLACE_ONLY_EXPERIENCE_POINTS, classify_location, score_profiles,
+)
+
+LOCATIONS = ["Houston, Texas, United States", "Chicago, IL", "Orlando, Florida, United States", "United States",
+             "Greater Seattle Area", "Toronto, Ontario, Canada", "Dallas-Fort Worth Metroplex", "Manila, Philippines",
+             "Phoenix, Arizona, United States", "New York City Metropolitan Area"]
+
+_CERTIFICATION_POINTS = {k.lower(): v for k, v in CERTIFICATION_POINTS.items()}
+
+
+def reference_score(attrs, location):
+    """The rubric one candidate at a time, for comparison"""
+    experience = 0
+    if attrs.years is None:
+        experience = WORKPLACE_ONLY_EXPERIENCE_POINTS if attrs.workplace_keywords else 0
+    else:
+        experience = next((points for low, points in EXPERIENCE_BRACKETS if attrs.years >= low), 0)
+    certifications = max((_CERTIFICATION_POINTS.get(k, 0) for k in attrs.certification_keywords), default=0)
+    skills = min(len(attrs.skill_keywords), MAX_SKILL_POINTS)
+    location_points = US_LOCATION_POINTS if classify_location(location) == LOCATION_US else 0
+    return experience + certifications + skills + location_points
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=500, help="candidates per batch (one search page is ~10)")
+    parser.add_argument("--threshold", type=float, default=7.0)
+    parser.add_argument("--borderline", type=float, default=1.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    attributes = extract_many(build_corpus(args.size, 0.3))
+    locations = [rng.choice(LOCATIONS) for _ in range(args.size)]
+    batches = [(attributes[i:i + args.batch], locations[i:i + args.batch]) for i in range(0, args.size, args.batch)]
+
+    start = time.perf_counter()
+    reference = [reference_score(a, l) for a, l in zip(attributes, locations)]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [score_profiles(a, l, args.threshold, args.borderline) for a, l in batches]
+    array_seconds = time.perf_counter() - start
+
+    scores = [float(s) for result in results for s in result.scores]
+    assert scores == [float(s) for s in reference]
+    needs_review = sum(int(result.needs_review.sum()) for result in results)
+
+    print(f"{args.size} candidates in batches of {args.batch}")
+    for name, seconds in [("per-candidate loop", loop_seconds), ("array engine", array_seconds)]:
+        print(f"{name:<20} {seconds * 1000:>9.1f} ms  {args.size / seconds:>12,.0f} candidates/s")
+    print(f"sent to the LLM analyzer: {needs_review} ({needs_review / args.size:.1%}); "
+          f"LLM scorings avoided: {args.size - needs_review} ({1 - needs_review / args.size:.1%})")
+
+
+if __name__ == "__main__":
+    main()
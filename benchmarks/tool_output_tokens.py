@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Compare the size of DatabaseTool responses in each output format.
+
+Renders synthetic candidate rows the way ``get_candidates`` returns them and
+counts the LLM tokens of each format (with tiktoken when installed)::
+
+    python -m benchmarks.tool_output_tokens --rows 100
+"""
+import argparse
+import random
+from decimal import Decimal
+
+from .extractor_bench import build_corpus
+from .scoring_bench import LOCATIONS
+
+from recruitment.tools.database_tool import DatabaseTool
+from recruitment.tools.extractor import extract
+from recruitment.tools.tokens import count_tokens, token_counter_name
+
+FORMATS = [
+    ("verbose", {"format": "verbose"}),
+    ("compact", {"format": "compact"}),
+    ("compact, 4 fields", {"format": "compact", "fields": "id,name,score,certifications"}),
+    ("compact, max_chars=30", {"format": "compact", "max_chars": "30"}),
+    ("summary", {"format": "summary"}),
+]
+
+
+def build_rows(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i, position in enumerate(build_corpus(count, 1.0, seed), 1):
+        attrs = extract(position)
+        rows.append({
+            "id": i,
+            "name": f"Candidate {i}",
+            "position": position,
+            "location": rng.choice(LOCATIONS),
+            "profile_link": f"https://www.linkedin.com/in/candidate-{i}",
+            "score": Decimal(rng.randint(10, 100)) / 10,
+            "experience": attrs.experience,
+            "certifications": attrs.certifications,
+            "skills": attrs.skills,
+            "workplace": attrs.workplace,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100, help="candidates per response (get_candidates default)")
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    tool = DatabaseTool()
+    baseline = None
+    print(f"{args.rows} candidates, tokens counted with {token_counter_name()}")
+    for name, options in FORMATS:
+        text = tool._render(rows, options)
+        tokens = count_tokens(text)
+        baseline = baseline or tokens
+        print(f"{name:<24} {len(text):>8} chars {tokens:>8} tokens  {tokens / baseline:>6.1%} of verbose")
+
+
+if __name__ == "__main__":
+    main()
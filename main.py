@@ -16,6 +16,10 @@ if missing_vars:
     exit(1)
 
 if __name__ == "__main__":
+    # Bring the database schema up to date once, before any worker starts
+    from recruitment.migrate import migrate
+    migrate()
+
     # Run the FastAPI server
     uvicorn.run(
         "recruitment.api:app", 
@@ -1,14 +1,29 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Literal
 import asyncio
+import base64
+import binascii
+import csv
+import hashlib
+import io
+import logging
 import os
 import json
+import time
+import uuid
+import zlib
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 
-from .crew import PharmacyTechnicianCrew
-from .tools import Database
+from .tools import metrics
+from .tools.async_database import AsyncDatabase
+from .tools.pool import get_pool
+from .tools.query_cache import get_query_cache
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Pharmacy Technician LinkedIn Agent API",
@@ -25,11 +40,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-background_jobs = {}
+# Database calls run on a bounded thread pool so they never block the event loop
+db = AsyncDatabase()
+
+@app.on_event("shutdown")
+def shutdown_database():
+    db.shutdown()
 
 class SearchRequest(BaseModel):
     criteria: str
     job_description: Optional[str] = None
+    max_pages: Optional[int] = Field(None, ge=1, le=100, description="Result pages to walk per LinkedIn search")
+    page_concurrency: Optional[int] = Field(None, ge=1, le=10, description="Result pages fetched in parallel")
+    target_count: Optional[int] = Field(None, ge=1, description="Stop once this many profiles were found")
+    analysis_mode: Literal["sequential", "sharded"] = Field(
+        "sequential", description="Analyze candidates in one pass or in parallel shards"
+    )
+    shard_size: Optional[int] = Field(None, ge=1, le=500, description="Candidates per analysis shard")
+    analysis_concurrency: Optional[int] = Field(None, ge=1, le=32, description="Analysis shards run in parallel")
+    profile: bool = Field(False, description="Sample the job's stacks; see /api/jobs/{job_id}/profile")
 
 class CandidateResponse(BaseModel):
     id: int
@@ -43,6 +72,11 @@ class CandidateResponse(BaseModel):
     workplace: Optional[str] = None
     score: Optional[float] = None
 
+class CandidateSearchResponse(BaseModel):
+    candidates: List[CandidateResponse]
+    total: Optional[int] = None
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
 class OutreachRequest(BaseModel):
     candidate_id: int
     message_template: str
@@ -54,100 +88,413 @@ class ReportRequest(BaseModel):
 
 class JobStatus(BaseModel):
     job_id: str
+    kind: str
     status: str
     start_time: str
     end_time: Optional[str] = None
+    attempts: int = 0
     result: Optional[Dict[str, Any]] = None
 
-async def run_linkedin_search(job_id: str, criteria: str):
-    try:
-        background_jobs[job_id]["status"] = "running"
-        
-        # Initialize and run CrewAI crew
-        crew = PharmacyTechnicianCrew()
-        results = crew.crew().kickoff(inputs={"criteria": criteria}) 
-        
-        # Update job with results
-        background_jobs[job_id]["status"] = "completed"
-        background_jobs[job_id]["end_time"] = datetime.now().isoformat()
-        background_jobs[job_id]["result"] = {"message": "Search completed successfully", "details": results}
-        
-    except Exception as e:
-        background_jobs[job_id]["status"] = "failed"
-        background_jobs[job_id]["end_time"] = datetime.now().isoformat()
-        background_jobs[job_id]["result"] = {"error": str(e)}
+TERMINAL_JOB_STATUSES = ("completed", "failed")
+JOB_EVENTS_POLL_INTERVAL = float(os.environ.get("JOB_EVENTS_POLL_INTERVAL", "1"))
+JOB_EVENTS_KEEPALIVE = 15.0
 
 @app.post("/api/search", response_model=Dict[str, str])
-async def search_linkedin(search_request: SearchRequest, background_tasks: BackgroundTasks):
-    job_id = f"search_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    
-    background_jobs[job_id] = {
-        "status": "queued",
-        "start_time": datetime.now().isoformat(),
-        "end_time": None,
-        "result": None
-    }
-    
-    # Start background task
-    background_tasks.add_task(run_linkedin_search, job_id, search_request.criteria)
+async def search_linkedin(search_request: SearchRequest):
+    """Queue a LinkedIn search; crew workers (python -m recruitment.worker) pick it up"""
+    try:
+        job_id = await db.enqueue_job("search", search_request.model_dump())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     
-    return {"job_id": job_id, "message": "Search job started"}
+    return {"job_id": str(job_id), "message": "Search job queued"}
+
+
+async def fetch_job(job_id: uuid.UUID):
+    try:
+        job = await db.get_job(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: uuid.UUID):
+    """Get the status and result of a queued, running or finished job"""
+    job = await fetch_job(job_id)
+    start_time = job["started_at"] or job["created_at"]
+    return JobStatus(
+        job_id=str(job["id"]),
+        kind=job["kind"],
+        status=job["status"],
+        start_time=start_time.isoformat(),
+        end_time=job["finished_at"].isoformat() if job["finished_at"] else None,
+        attempts=job["attempts"],
+        result=job["result"],
+    )
+
+@app.get("/api/jobs/{job_id}/trace", response_model=Dict[str, Any])
+async def get_job_trace(job_id: uuid.UUID):
+    """Get the span tree of a finished job: tasks, tool calls, DB queries and page loads with their timings"""
+    try:
+        job = await db.get_job_trace(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["trace"] is None:
+        raise HTTPException(status_code=404, detail="No trace recorded yet; traces are stored when the job finishes")
+    return {"job_id": str(job["id"]), "status": job["status"], **job["trace"]}
+
+@app.get("/api/jobs/{job_id}/profile")
+async def get_job_profile(job_id: uuid.UUID):
+    """Get the sampled stacks of a job queued with profile=true, in folded format for flame graph tools"""
+    try:
+        job = await db.get_job_profile(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["profile"] is None:
+        raise HTTPException(status_code=404, detail="No profile recorded; queue the search with profile=true")
+    return Response(content=job["profile"], media_type="text/plain; charset=utf-8")
+
+def format_sse(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def format_job_event(row):
+    return format_sse(row["id"], row["stage"], {**row["data"], "at": row["created_at"].isoformat()})
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: uuid.UUID,
+    last_event_id: Optional[int] = Header(None, description="Resume after this event id (sent by EventSource on reconnect)")
+):
+    """Stream a job's progress events as Server-Sent Events until the job finishes"""
+    await fetch_job(job_id)
+
+    async def events():
+        after_id = last_event_id or 0
+        last_sent = asyncio.get_running_loop().time()
+        while True:
+            rows = await db.get_job_events(job_id, after_id)
+            for row in rows:
+                after_id = row["id"]
+                yield format_job_event(row)
+            if rows:
+                last_sent = asyncio.get_running_loop().time()
+                continue
+
+            # Only check for completion once every recorded event has been sent
+            job = await db.get_job(job_id)
+            if job is None or job["status"] in TERMINAL_JOB_STATUSES:
+                # Events recorded between the fetch above and the job finishing
+                for row in await db.get_job_events(job_id, after_id):
+                    after_id = row["id"]
+                    yield format_job_event(row)
+                status = job["status"] if job else "deleted"
+                yield format_sse(after_id, "end", {"status": status})
+                return
+
+            if asyncio.get_running_loop().time() - last_sent >= JOB_EVENTS_KEEPALIVE:
+                yield ": keepalive\n\n"
+                last_sent = asyncio.get_running_loop().time()
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/db/pool", response_model=Dict[str, Any])
+async def get_pool_stats():
+    """Get connection pool occupancy and checkout wait times"""
+    return get_pool().stats()
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row of a page as an opaque token"""
+    raw = json.dumps([str(v) if isinstance(v, Decimal) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
 
+async def cached_query(name: str, *args, **kwargs):
+    """Serve a Database read from the query cache, loading it on a miss.
+
+    The shared data version is re-read at most once per check interval, so
+    writes made by worker processes are picked up within that interval.
+    """
+    cache = get_query_cache()
+    if cache.version_is_stale():
+        cache.observe_version(await db.get_data_version())
+    key = (name, args, tuple(sorted(kwargs.items())))
+    entry = cache.get(key)
+    if entry is None:
+        generation = cache.generation
+        value = await getattr(db, name)(*args, **kwargs)
+        entry = cache.put(key, value, generation)
+    return entry
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+@app.get("/api/cache", response_model=Dict[str, Any])
+async def get_cache_stats():
+    """Get query cache occupancy and hit rates"""
+    return get_query_cache().stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Latency histograms and counters of this process in the Prometheus text format"""
+    if not metrics.enabled():
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/api/statistics", response_model=Dict[str, Any])
+async def get_statistics(
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get candidate statistics (totals, average score, top locations and workplaces)"""
+    try:
+        entry = await cached_query("get_statistics")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if etag_matches(entry.etag, if_none_match):
+        return not_modified(entry.etag)
+
+    response.headers["ETag"] = entry.etag
+    response.headers["Cache-Control"] = "no-cache"
+    return entry.value
 
 @app.get("/api/candidates", response_model=List[CandidateResponse])
 async def get_candidates(
+    response: Response,
     limit: int = Query(100, description="Maximum number of candidates to return"),
-    offset: int = Query(0, description="Number of candidates to skip")
+    offset: int = Query(0, description="Number of candidates to skip"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page; overrides offset"),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get all candidates from the database"""
+    """Get all candidates from the database.
+
+    Full pages carry an ``X-Next-Cursor`` header; pass it back as ``cursor``
+    to fetch the next page in constant time regardless of depth.
+    """
+    after_id = None
+    if cursor is not None:
+        (after_id,) = decode_cursor(cursor, 1)
+        if not isinstance(after_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     try:
-        db = Database()
-        candidates = db.get_candidates(limit, offset)
-        db.close()
-        return candidates
+        entry = await cached_query("get_candidates", limit, offset, after_id=after_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if etag_matches(entry.etag, if_none_match):
+        return not_modified(entry.etag)
+
+    candidates = entry.value
+    response.headers["ETag"] = entry.etag
+    response.headers["Cache-Control"] = "no-cache"
+    if candidates and len(candidates) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(candidates[-1]["id"])
+    return candidates
 
 @app.get("/api/candidates/top", response_model=List[CandidateResponse])
 async def get_top_candidates(
-    limit: int = Query(10, description="Number of top candidates to return")
+    response: Response,
+    limit: int = Query(10, description="Number of top candidates to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get top scored candidates from the database, paged by (score, id)"""
+    after = None
+    if cursor is not None:
+        score, candidate_id = decode_cursor(cursor, 2)
+        try:
+            after = (Decimal(score), int(candidate_id))
+        except (InvalidOperation, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        entry = await cached_query("get_top_candidates", limit, after=after)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    if etag_matches(entry.etag, if_none_match):
+        return not_modified(entry.etag)
+
+    candidates = entry.value
+    response.headers["ETag"] = entry.etag
+    response.headers["Cache-Control"] = "no-cache"
+    if candidates and len(candidates) == limit:
+        last = candidates[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last["score"], last["id"])
+    return candidates
+
+EXPORT_COLUMNS = [
+    "id", "name", "position", "location", "profile_link", "experience", "certifications", "skills",
+    "workplace", "score", "score_source", "created_at", "updated_at",
+]
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "2000"))
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def export_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def encode_export_rows(rows, export_format: str) -> str:
+    if export_format == "ndjson":
+        return "".join(json.dumps({k: export_value(row[k]) for k in EXPORT_COLUMNS}) + "\n" for row in rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([export_value(row[k]) for k in EXPORT_COLUMNS] for row in rows)
+    return buffer.getvalue()
+
+@app.get("/api/candidates/export")
+async def export_candidates(
+    format: Literal["csv", "ndjson"] = Query("csv", description="csv (with a header row) or ndjson"),
+    gzip: bool = Query(False, description="Compress the file with gzip"),
+):
+    """Stream every candidate with details as CSV or NDJSON.
+
+    Rows come from a server-side cursor in batches and are written out as
+    they arrive, so memory stays flat regardless of table size. Each export
+    holds a database connection until it ends, so only a few run at once;
+    beyond that the request is refused with 503.
+    """
+    if not db.stream_available():
+        raise HTTPException(status_code=503, detail="Too many exports in progress, retry shortly",
+                            headers={"Retry-After": "10"})
+
+    async def body():
+        compressor = zlib.compressobj(wbits=31) if gzip else None
+        def encode(text: str) -> bytes:
+            data = text.encode()
+            return compressor.compress(data) if compressor else data
+
+        start = time.monotonic()
+        rows_sent = 0
+        try:
+            if format == "csv":
+                yield encode(",".join(EXPORT_COLUMNS) + "\n")
+            async for rows in db.stream(lambda database: database.open_export_cursor(EXPORT_BATCH_SIZE),
+                                        batch_size=EXPORT_BATCH_SIZE):
+                chunk = encode(encode_export_rows(rows, format))
+                rows_sent += len(rows)
+                if chunk:
+                    yield chunk
+            if compressor:
+                yield compressor.flush()
+        finally:
+            elapsed = time.monotonic() - start
+            logger.info("Exported %d candidates as %s%s in %.2fs (%.0f rows/s)", rows_sent, format,
+                        " (gzip)" if gzip else "", elapsed, rows_sent / elapsed if elapsed else 0.0)
+
+    filename = f"candidates.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
+
+def facet_values(values: List[str], normalize) -> tuple:
+    """Normalized, de-duplicated filter values; sorted so equal filters share a cache entry"""
+    return tuple(sorted({normalize(v.strip()) for v in values if v.strip()}))
+
+# Declared before /api/candidates/{candidate_id} so "search" is not read as an id
+@app.get("/api/candidates/search", response_model=CandidateSearchResponse)
+async def search_candidates(
+    response: Response,
+    q: Optional[str] = Query(None, description="Full-text query over name, position, location and details"),
+    certification: List[str] = Query([], description="Required certification tags, e.g. cpht, ptcb"),
+    skill: List[str] = Query([], description="Required skill tags, e.g. sterile, compounding"),
+    workplace: List[str] = Query([], description="Required workplace tags, e.g. hospital, cvs"),
+    state: List[str] = Query([], description="US state codes; any of them matches"),
+    min_score: Optional[float] = Query(None, ge=0, le=10, description="Minimum candidate score"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of candidates to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    facets: bool = Query(False, description="Include the match count and facet counts (scans every match)"),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get top scored candidates from the database"""
+    """Filter candidates by tags, state, score and text, best score first.
+
+    Tag filters require every listed tag. Full pages carry an
+    ``X-Next-Cursor`` header to pass back as ``cursor``. Facet counts are
+    opt-in: they aggregate every matching row, so broad queries cost a scan
+    where the page itself is served from the indexes.
+    """
+    filters = dict(
+        query=q.strip() if q and q.strip() else None,
+        certifications=facet_values(certification, str.lower),
+        skills=facet_values(skill, str.lower),
+        workplaces=facet_values(workplace, str.lower),
+        states=facet_values(state, str.upper),
+        min_score=min_score,
+    )
+    after = None
+    if cursor is not None:
+        score, candidate_id = decode_cursor(cursor, 2)
+        try:
+            after = (Decimal(score), int(candidate_id))
+        except (InvalidOperation, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     try:
-        db = Database()
-        candidates = db.get_top_candidates(limit)
-        db.close()
-        return candidates
+        entry = await cached_query("search_candidates", limit, after=after, **filters)
+        facet_entry = await cached_query("get_search_facets", **filters) if facets else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    etag = entry.etag
+    if facet_entry is not None:
+        etag = f'"{hashlib.sha1((entry.etag + facet_entry.etag).encode()).hexdigest()}"'
+    if etag_matches(etag, if_none_match):
+        return not_modified(etag)
+
+    candidates = entry.value
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    if candidates and len(candidates) == limit:
+        last = candidates[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last["score"], last["id"])
+    if facet_entry is None:
+        return {"candidates": candidates}
+    return {"candidates": candidates, **facet_entry.value}
+
 @app.get("/api/candidates/{candidate_id}", response_model=CandidateResponse)
-async def get_candidate(candidate_id: int):
+async def get_candidate(
+    candidate_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+):
     """Get a specific candidate by ID"""
     try:
-        db = Database()
-        candidate = db.get_candidate_by_id(candidate_id)
-        db.close()
-        
-        if not candidate:
-            raise HTTPException(status_code=404, detail="Candidate not found")
-            
-        return candidate
+        entry = await cached_query("get_candidate_by_id", candidate_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    if not entry.value:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    if etag_matches(entry.etag, if_none_match):
+        return not_modified(entry.etag)
 
-    """Generate a comprehensive report on candidates"""
-    job_id = f"report_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    
-    background_jobs[job_id] = {
-        "status": "queued",
-        "start_time": datetime.now().isoformat(),
-        "end_time": None,
-        "result": None
-    }
-    
-    # This would normally trigger the report agent via CrewAI
-    # For now, we'll just return a job ID
-    
-    return {"job_id": job_id, "message": "Report generation started"}
\ No newline at end of file
+    response.headers["ETag"] = entry.etag
+    response.headers["Cache-Control"] = "no-cache"
+    return entry.value
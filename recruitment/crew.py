@@ -1,88 +1,227 @@
+import contextvars
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from pathlib import Path
+
+import yaml
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
 from crewai_tools import SerperDevTool, ScrapeWebsiteTool
-from .tools import LinkedInTool, DatabaseTool
+from .tools import LinkedInTool, DatabaseTool, metrics
+from .tools.progress import collect_candidates, emit, stage
+from .tools.tracing import span
 
+CONFIG_DIR = Path(__file__).parent / "config"
 
-@CrewBase
-class PharmacyTechnicianCrew:
-    agents_config = 'config/agents.yaml'
-    tasks_config = 'config/tasks.yaml'
-
-    @agent
-    def researcher(self) -> Agent:
-        return Agent(
-            config=self.agents_config['researcher'],
-            tools=[SerperDevTool(), ScrapeWebsiteTool(), LinkedInTool()],
-            allow_delegation=False,
-            verbose=True
-        )
+# Tools each agent gets, by key into shared_tools()
+AGENT_TOOLS = {
+    "researcher": ["serper", "scrape", "linkedin"],
+    "analyzer": ["database"],
+    "communicator": ["serper", "scrape", "database"],
+    "reporter": ["database"],
+}
 
-    @agent
-    def analyzer(self) -> Agent:
-        return Agent(
-            config=self.agents_config['analyzer'],
-            tools=[DatabaseTool()],
-            allow_delegation=False,
-            verbose=True
-        )
+# Tasks in execution order: task name -> (agent name, names of context tasks)
+TASKS = {
+    "search_linkedin_task": ("researcher", []),
+    "analyze_candidates_task": ("analyzer", ["search_linkedin_task"]),
+    "develop_outreach_strategy_task": ("communicator", ["analyze_candidates_task"]),
+    "generate_report_task": (
+        "reporter", ["search_linkedin_task", "analyze_candidates_task", "develop_outreach_strategy_task"]
+    ),
+}
 
-    @agent
-    def communicator(self) -> Agent:
-        return Agent(
-            config=self.agents_config['communicator'],
-            tools=[SerperDevTool(), ScrapeWebsiteTool(), DatabaseTool()],
-            allow_delegation=False,
-            verbose=True
-        )
+# Per-shard tasks used by kickoff_sharded(): task name -> agent name
+SHARD_TASKS = {
+    "analyze_candidate_shard_task": "analyzer",
+    "develop_outreach_shard_task": "communicator",
+}
 
-    @agent
-    def reporter(self) -> Agent:
-        return Agent(
-            config=self.agents_config['reporter'],
-            tools=[DatabaseTool()],
-            allow_delegation=False,
-            verbose=True
-        )
+DEFAULT_CRITERIA = "Pharmacy Technician, United States"
 
-    @task
-    def search_linkedin_task(self, criteria=None) -> Task:
-        return Task(
-            config=self.tasks_config['search_linkedin_task'],
-            agent=self.researcher(),
-            input_data={"criteria": criteria if criteria else "Pharmacy Technician, United States"}
-        )
 
-    @task
-    def analyze_candidates_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['analyze_candidates_task'],
-            agent=self.analyzer(),
-            context=[self.search_linkedin_task()]
-        )
+@lru_cache(maxsize=None)
+def load_config(name):
+    """Parse config/<name>.yaml once per process"""
+    with open(CONFIG_DIR / f"{name}.yaml") as f:
+        return yaml.safe_load(f)
 
-    @task
-    def develop_outreach_strategy_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['develop_outreach_strategy_task'],
-            agent=self.communicator(),
-            context=[self.analyze_candidates_task()]
-        )
 
-    @task
-    def generate_report_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['generate_report_task'],
-            agent=self.reporter(),
-            context=[self.search_linkedin_task(), self.analyze_candidates_task(), self.develop_outreach_strategy_task()],
-        )
+@lru_cache(maxsize=None)
+def shared_tools():
+    """Tool instances shared by every agent and job in the process; none of them keep per-job state"""
+    return {
+        "serper": SerperDevTool(),
+        "scrape": ScrapeWebsiteTool(),
+        "linkedin": LinkedInTool(),
+        "database": DatabaseTool(),
+    }
+
+
+_thread_agents = threading.local()
+
+
+@lru_cache(maxsize=None)
+def shard_executor():
+    """Threads that run analysis shards for every job in the process.
+
+    Kept for the life of the process so each thread builds its agents once.
+    """
+    return ThreadPoolExecutor(
+        max_workers=int(os.environ.get("ANALYSIS_SHARD_THREADS", "8")),
+        thread_name_prefix="crew-shard",
+    )
+
+
+def split_shards(candidate_ids, shard_size):
+    """Split ``candidate_ids`` into consecutive lists of at most ``shard_size``"""
+    if shard_size < 1:
+        raise ValueError(f"Invalid shard size: {shard_size}")
+    candidate_ids = list(candidate_ids)
+    return [candidate_ids[i:i + shard_size] for i in range(0, len(candidate_ids), shard_size)]
+
+
+class PharmacyTechnicianCrew:
+    """Blueprint for the Pharmacy Technician recruitment crew.
+
+    Configs and tools are built once per process and agents once per thread
+    (an agent holds executor state while it works, so concurrent jobs must
+    not share one). Each job only builds its own Task objects and Crew.
+    """
+
+    def __init__(self):
+        self.agents_config = load_config("agents")
+        self.tasks_config = load_config("tasks")
+
+    def agents(self):
+        """Agents for the calling thread, keyed by name"""
+        agents = getattr(_thread_agents, "agents", None)
+        if agents is None:
+            tools = shared_tools()
+            agents = _thread_agents.agents = {
+                name: Agent(
+                    config=self.agents_config[name],
+                    tools=[tools[key] for key in tool_keys],
+                    allow_delegation=False,
+                    verbose=True
+                )
+                for name, tool_keys in AGENT_TOOLS.items()
+            }
+        return agents
+
+    def tasks(self):
+        """Fresh tasks for one job, wired to the thread's agents and to each other"""
+        agents = self.agents()
+        tasks = {}
+        for name, (agent_name, context) in TASKS.items():
+            tasks[name] = Task(
+                config=self.tasks_config[name],
+                agent=agents[agent_name],
+                context=[tasks[dependency] for dependency in context] or None
+            )
+        return tasks
 
-    @crew
     def crew(self) -> Crew:
         """Creates the Pharmacy Technician recruitment crew"""
         return Crew(
-            agents=self.agents,
-            tasks=self.tasks,
+            agents=list(self.agents().values()),
+            tasks=list(self.tasks().values()),
             process=Process.sequential,
             verbose=True,
-        )
\ No newline at end of file
+        )
+
+    def kickoff(self, criteria=None):
+        """Run a fresh crew for ``criteria``"""
+        return self.crew().kickoff(inputs={"criteria": criteria or DEFAULT_CRITERIA})
+
+    def run_task(self, name, agent_name, inputs, context=None, **event_data):
+        """Run task ``name`` alone in a one-agent crew; returns the task and the crew output"""
+        task = Task(config=self.tasks_config[name], agent=self.agents()[agent_name], context=context or None)
+        with stage("task", task=name, **event_data), span("task", task=name, **event_data), metrics.timer(
+            metrics.CREW_TASK_SECONDS, name, errors=metrics.CREW_TASK_ERRORS
+        ):
+            output = Crew(
+                agents=[task.agent],
+                tasks=[task],
+                process=Process.sequential,
+                verbose=True,
+            ).kickoff(inputs=inputs)
+        return task, output
+
+    def kickoff_sharded(self, criteria=None, shard_size=25, concurrency=4):
+        """Search, then analyze the new candidates in parallel shards.
+
+        The new or changed candidates from the search that pre-scoring left
+        for review are split into shards of ``shard_size``; at most ``concurrency`` shard
+        tasks run at once. A shard's outreach task is queued as soon as its
+        analysis finishes, ahead of shards still waiting for analysis, and
+        candidates already scored by the rules go straight to outreach. Scores
+        and outreach are written to the database by the shard tasks; the
+        report task runs last with every shard's output as context.
+
+        A shard task that fails does not stop the others: its shard gets no
+        further tasks and the report covers the shards that succeeded.
+        Returns the report and a summary of the shards, including the failed
+        ones; raises if there were shards and every one of them failed.
+        """
+        if concurrency < 1:
+            raise ValueError(f"Invalid analysis concurrency: {concurrency}")
+        inputs = {"criteria": criteria or DEFAULT_CRITERIA}
+        with collect_candidates() as collected:
+            search_task, _ = self.run_task("search_linkedin_task", "researcher", inputs)
+        review_shards = split_shards(sorted(collected.needs_review), shard_size)
+        scored_shards = split_shards(sorted(collected.processed - collected.needs_review), shard_size)
+        shards = review_shards + scored_shards
+        emit("analysis_sharded", candidates=len(collected.processed), needs_review=len(collected.needs_review),
+             skipped=len(collected.skipped), shards=len(shards), analysis_shards=len(review_shards),
+             concurrency=concurrency)
+
+        analyses = [None] * len(shards)
+        outreach = [None] * len(shards)
+        failed = {}
+        waiting = deque(("analysis", index) for index in range(len(review_shards)))
+        waiting.extendleft(("outreach", index) for index in range(len(review_shards), len(shards)))
+        running = {}
+        executor = shard_executor()
+        while waiting or running:
+            while waiting and len(running) < concurrency:
+                kind, index = waiting.popleft()
+                name = "analyze_candidate_shard_task" if kind == "analysis" else "develop_outreach_shard_task"
+                shard_inputs = {**inputs, "candidate_ids": ", ".join(str(i) for i in shards[index])}
+                context = [search_task] if kind == "analysis" else [analyses[index] or search_task]
+                future = executor.submit(
+                    contextvars.copy_context().run,
+                    self.run_task, name, SHARD_TASKS[name], shard_inputs, context,
+                    shard=index + 1, shards=len(shards), candidates=len(shards[index]),
+                )
+                running[future] = (kind, index)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, index = running.pop(future)
+                try:
+                    task, _ = future.result()
+                except Exception as e:
+                    # Already reported by run_task as task_failed; the other shards carry on
+                    failed[index] = {"shard": index + 1, "task": kind, "error": f"{type(e).__name__}: {e}"}
+                    continue
+                if kind == "analysis":
+                    analyses[index] = task
+                    waiting.appendleft(("outreach", index))
+                else:
+                    outreach[index] = task
+
+        if shards and len(failed) == len(shards):
+            raise RuntimeError(f"All {len(shards)} analysis shards failed; first error: {failed[min(failed)]['error']}")
+        _, report = self.run_task(
+            "generate_report_task", "reporter", inputs,
+            [search_task, *(task for task in analyses + outreach if task is not None)]
+        )
+        summary = {
+            "shards": len(shards),
+            "analysis_shards": len(review_shards),
+            "succeeded": len(shards) - len(failed),
+            "failed": [failed[index] for index in sorted(failed)],
+        }
+        return report, summary
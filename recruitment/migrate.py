@@ -0,0 +1,92 @@
+import re
+from pathlib import Path
+
+from .tools.database import Database
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Arbitrary key for pg_advisory_lock so concurrent deploys apply migrations once
+MIGRATION_LOCK_ID = 72_310_001
+
+
+def available_migrations():
+    """List (version, name, path) for every migration script, in order"""
+    migrations = []
+    for path in MIGRATIONS_DIR.iterdir():
+        match = MIGRATION_FILE.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path))
+    migrations.sort()
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {MIGRATIONS_DIR}")
+    return migrations
+
+
+def migrate():
+    """Apply pending migrations and return the versions that were applied.
+
+    Each script runs in its own transaction together with its
+    ``schema_migrations`` row, so a failed script leaves the schema at the
+    previous version.
+    """
+    applied_now = []
+    with Database() as db:
+        cursor = db.cursor
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            db.conn.commit()
+
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row['version'] for row in cursor.fetchall()}
+
+            for version, name, path in available_migrations():
+                if version in applied:
+                    continue
+                try:
+                    cursor.execute(path.read_text())
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                        (version, name)
+                    )
+                    db.conn.commit()
+                except Exception:
+                    db.conn.rollback()
+                    raise
+                applied_now.append(version)
+        finally:
+            db.conn.rollback()
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            db.conn.commit()
+    return applied_now
+
+
+def schema_version():
+    """Return the highest applied migration version, or 0 for an empty database"""
+    with Database() as db:
+        db.cursor.execute("SELECT to_regclass('schema_migrations') AS table_name")
+        if db.cursor.fetchone()['table_name'] is None:
+            return 0
+        db.cursor.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_migrations")
+        return db.cursor.fetchone()['version']
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    applied = migrate()
+    if applied:
+        print(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        print("Database schema is up to date")
+    print(f"Schema version: {schema_version()}")
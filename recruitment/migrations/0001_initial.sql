@@ -0,0 +1,34 @@
+-- Baseline schema, formerly created by Database.create_tables() on every connection.
+CREATE TABLE IF NOT EXISTS candidates (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255),
+    position VARCHAR(255),
+    location VARCHAR(255),
+    profile_link VARCHAR(255) UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS candidate_details (
+    id SERIAL PRIMARY KEY,
+    candidate_id INTEGER REFERENCES candidates(id),
+    experience TEXT,
+    certifications TEXT,
+    skills TEXT,
+    workplace TEXT,
+    score DECIMAL(3,1),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS outreach (
+    id SERIAL PRIMARY KEY,
+    candidate_id INTEGER REFERENCES candidates(id),
+    message_template TEXT,
+    strategy TEXT,
+    status VARCHAR(50) DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_candidate_score ON candidate_details(score DESC);
+
+CREATE INDEX IF NOT EXISTS idx_candidate_location ON candidates(location);
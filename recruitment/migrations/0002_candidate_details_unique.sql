@@ -0,0 +1,10 @@
+-- One details row per candidate. Older databases may hold duplicates written
+-- by the insert-then-update fallback, so keep only the most recent row first.
+DELETE FROM candidate_details cd
+USING candidate_details newer
+WHERE cd.candidate_id = newer.candidate_id
+  AND (COALESCE(cd.updated_at, 'epoch'), cd.id) < (COALESCE(newer.updated_at, 'epoch'), newer.id);
+
+-- Also serves the candidates/candidate_details joins on candidate_id.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_candidate_details_candidate_id
+    ON candidate_details(candidate_id);
@@ -0,0 +1,7 @@
+-- Serves ORDER BY score DESC, candidate_id DESC for keyset pagination of the
+-- top candidates; supersedes the single-column score index.
+CREATE INDEX IF NOT EXISTS idx_candidate_details_score_candidate
+    ON candidate_details(score DESC, candidate_id DESC)
+    WHERE score IS NOT NULL;
+
+DROP INDEX IF EXISTS idx_candidate_score;
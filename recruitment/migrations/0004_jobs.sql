@@ -0,0 +1,20 @@
+-- Durable job queue shared by the API (enqueue, status) and crew workers (claim, run).
+CREATE TABLE IF NOT EXISTS jobs (
+    id UUID PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    payload JSONB NOT NULL DEFAULT '{}',
+    result JSONB,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    heartbeat_at TIMESTAMP
+);
+
+-- Claiming scans only queued jobs, oldest first
+CREATE INDEX IF NOT EXISTS idx_jobs_queued ON jobs(created_at) WHERE status = 'queued';
+
+-- Stale-job recovery scans only running jobs
+CREATE INDEX IF NOT EXISTS idx_jobs_running ON jobs(heartbeat_at) WHERE status = 'running';
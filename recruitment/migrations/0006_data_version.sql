@@ -0,0 +1,37 @@
+-- A single counter bumped by every write to the candidate tables, so API
+-- processes can tell cheaply whether their cached query results are stale.
+--
+-- Tradeoff: the bump row-locks this one row until the writing transaction
+-- commits, so write transactions on candidates/candidate_details run one at
+-- a time across all workers. Each write path commits right after its batch
+-- (one page of upserts), which keeps the wait short. The lock is also what
+-- keeps concurrent writers deadlock-free: this trigger sorts before the
+-- stats_* triggers of 0007, so a writer holds it before touching the shared
+-- location_counts/workplace_counts rows, which are locked in no fixed order.
+-- A non-transactional signal such as a sequence would drop both guarantees:
+-- readers could see the new version before the data commits and cache the
+-- old rows under it.
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL
+);
+
+INSERT INTO data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level, so a batch upsert bumps the version once
+DROP TRIGGER IF EXISTS candidates_data_version ON candidates;
+CREATE TRIGGER candidates_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON candidates
+    FOR EACH STATEMENT EXECUTE PROCEDURE bump_data_version();
+
+DROP TRIGGER IF EXISTS candidate_details_data_version ON candidate_details;
+CREATE TRIGGER candidate_details_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON candidate_details
+    FOR EACH STATEMENT EXECUTE PROCEDURE bump_data_version();
@@ -0,0 +1,165 @@
+-- Aggregates behind Database.get_statistics(), kept current by statement-level
+-- triggers so reading them never scans the candidate tables. Transition tables
+-- let a batch upsert adjust each aggregate once per statement.
+CREATE TABLE IF NOT EXISTS candidate_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_candidates BIGINT NOT NULL DEFAULT 0,
+    scored_count BIGINT NOT NULL DEFAULT 0,
+    score_sum NUMERIC NOT NULL DEFAULT 0,
+    with_certifications BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS location_counts (
+    location VARCHAR(255) PRIMARY KEY,
+    count BIGINT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_location_counts_count ON location_counts(count DESC, location);
+
+CREATE TABLE IF NOT EXISTS workplace_counts (
+    workplace TEXT PRIMARY KEY,
+    count BIGINT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_workplace_counts_count ON workplace_counts(count DESC, workplace);
+
+CREATE OR REPLACE FUNCTION stats_candidates_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO location_counts (location, count)
+        SELECT location, COUNT(*) FROM new_rows
+        WHERE COALESCE(location, '') <> ''
+        GROUP BY location
+        ON CONFLICT (location) DO UPDATE SET count = location_counts.count + EXCLUDED.count;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE location_counts lc SET count = lc.count - o.n
+        FROM (
+            SELECT location, COUNT(*) AS n FROM old_rows
+            WHERE COALESCE(location, '') <> ''
+            GROUP BY location
+        ) o
+        WHERE lc.location = o.location;
+        DELETE FROM location_counts WHERE count <= 0;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        UPDATE candidate_stats SET total_candidates = total_candidates + (SELECT COUNT(*) FROM new_rows) WHERE id = 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE candidate_stats SET total_candidates = total_candidates - (SELECT COUNT(*) FROM old_rows) WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION stats_candidate_details_changed() RETURNS trigger AS $$
+DECLARE
+    added_scored BIGINT := 0;
+    added_sum NUMERIC := 0;
+    added_certified BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT COUNT(score), COALESCE(SUM(score), 0),
+               COUNT(*) FILTER (WHERE certifications IS NOT NULL AND certifications != '')
+        INTO added_scored, added_sum, added_certified
+        FROM new_rows;
+
+        INSERT INTO workplace_counts (workplace, count)
+        SELECT workplace, COUNT(*) FROM new_rows
+        WHERE workplace IS NOT NULL AND workplace != ''
+        GROUP BY workplace
+        ON CONFLICT (workplace) DO UPDATE SET count = workplace_counts.count + EXCLUDED.count;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT added_scored - COUNT(score), added_sum - COALESCE(SUM(score), 0),
+               added_certified - COUNT(*) FILTER (WHERE certifications IS NOT NULL AND certifications != '')
+        INTO added_scored, added_sum, added_certified
+        FROM old_rows;
+
+        UPDATE workplace_counts wc SET count = wc.count - o.n
+        FROM (
+            SELECT workplace, COUNT(*) AS n FROM old_rows
+            WHERE workplace IS NOT NULL AND workplace != ''
+            GROUP BY workplace
+        ) o
+        WHERE wc.workplace = o.workplace;
+        DELETE FROM workplace_counts WHERE count <= 0;
+    END IF;
+    IF added_scored <> 0 OR added_sum <> 0 OR added_certified <> 0 THEN
+        UPDATE candidate_stats
+        SET scored_count = scored_count + added_scored,
+            score_sum = score_sum + added_sum,
+            with_certifications = with_certifications + added_certified
+        WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION stats_candidates_truncated() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'candidates' THEN
+        UPDATE candidate_stats SET total_candidates = 0 WHERE id = 1;
+        DELETE FROM location_counts;
+    ELSE
+        UPDATE candidate_stats SET scored_count = 0, score_sum = 0, with_certifications = 0 WHERE id = 1;
+        DELETE FROM workplace_counts;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables require one trigger per event
+DROP TRIGGER IF EXISTS stats_candidates_insert ON candidates;
+CREATE TRIGGER stats_candidates_insert AFTER INSERT ON candidates
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE stats_candidates_changed();
+DROP TRIGGER IF EXISTS stats_candidates_update ON candidates;
+CREATE TRIGGER stats_candidates_update AFTER UPDATE ON candidates
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE stats_candidates_changed();
+DROP TRIGGER IF EXISTS stats_candidates_delete ON candidates;
+CREATE TRIGGER stats_candidates_delete AFTER DELETE ON candidates
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE stats_candidates_changed();
+DROP TRIGGER IF EXISTS stats_candidates_truncate ON candidates;
+CREATE TRIGGER stats_candidates_truncate AFTER TRUNCATE ON candidates
+    FOR EACH STATEMENT EXECUTE PROCEDURE stats_candidates_truncated();
+
+DROP TRIGGER IF EXISTS stats_candidate_details_insert ON candidate_details;
+CREATE TRIGGER stats_candidate_details_insert AFTER INSERT ON candidate_details
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE stats_candidate_details_changed();
+DROP TRIGGER IF EXISTS stats_candidate_details_update ON candidate_details;
+CREATE TRIGGER stats_candidate_details_update AFTER UPDATE ON candidate_details
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE stats_candidate_details_changed();
+DROP TRIGGER IF EXISTS stats_candidate_details_delete ON candidate_details;
+CREATE TRIGGER stats_candidate_details_delete AFTER DELETE ON candidate_details
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE stats_candidate_details_changed();
+DROP TRIGGER IF EXISTS stats_candidate_details_truncate ON candidate_details;
+CREATE TRIGGER stats_candidate_details_truncate AFTER TRUNCATE ON candidate_details
+    FOR EACH STATEMENT EXECUTE PROCEDURE stats_candidates_truncated();
+
+-- Backfill from the existing rows while writers are held off
+LOCK TABLE candidates, candidate_details IN SHARE ROW EXCLUSIVE MODE;
+
+INSERT INTO candidate_stats (id, total_candidates, scored_count, score_sum, with_certifications)
+SELECT 1,
+       (SELECT COUNT(*) FROM candidates),
+       (SELECT COUNT(score) FROM candidate_details),
+       (SELECT COALESCE(SUM(score), 0) FROM candidate_details),
+       (SELECT COUNT(*) FROM candidate_details WHERE certifications IS NOT NULL AND certifications != '')
+ON CONFLICT (id) DO UPDATE
+SET total_candidates = EXCLUDED.total_candidates, scored_count = EXCLUDED.scored_count,
+    score_sum = EXCLUDED.score_sum, with_certifications = EXCLUDED.with_certifications;
+
+DELETE FROM location_counts;
+INSERT INTO location_counts (location, count)
+SELECT location, COUNT(*) FROM candidates
+WHERE COALESCE(location, '') <> ''
+GROUP BY location;
+
+DELETE FROM workplace_counts;
+INSERT INTO workplace_counts (workplace, count)
+SELECT workplace, COUNT(*) FROM candidate_details
+WHERE workplace IS NOT NULL AND workplace != ''
+GROUP BY workplace;
@@ -0,0 +1,10 @@
+-- Who set a candidate's score: 'rules' (local pre-scoring), 'review' (a
+-- provisional rule score waiting for the LLM analyzer) or 'llm'.
+ALTER TABLE candidate_details ADD COLUMN IF NOT EXISTS score_source TEXT;
+
+-- Scores set before pre-scoring existed came from the analyzer
+UPDATE candidate_details SET score_source = 'llm' WHERE score_source IS NULL AND score > 0;
+
+CREATE INDEX IF NOT EXISTS idx_candidate_details_review
+    ON candidate_details(candidate_id)
+    WHERE score_source = 'review';
@@ -0,0 +1,25 @@
+-- Change tracking for incremental analysis: content_hash is a hash of the
+-- scraped fields, analyzed_hash the content_hash a score was last given for.
+-- A candidate needs analysis when the two differ.
+ALTER TABLE candidate_details
+    ADD COLUMN IF NOT EXISTS content_hash TEXT,
+    ADD COLUMN IF NOT EXISTS analyzed_hash TEXT,
+    ADD COLUMN IF NOT EXISTS analyzed_at TIMESTAMP;
+
+-- Same fields, order and separator as content_hash() in tools/database.py
+UPDATE candidate_details cd
+SET content_hash = md5(concat_ws(E'\x1f',
+    COALESCE(c.name, ''), COALESCE(c.position, ''), COALESCE(c.location, ''),
+    COALESCE(cd.experience, ''), COALESCE(cd.certifications, ''), COALESCE(cd.skills, ''),
+    COALESCE(cd.workplace, '')))
+FROM candidates c
+WHERE c.id = cd.candidate_id AND cd.content_hash IS NULL;
+
+-- Candidates scored before change tracking count as analyzed at their current content
+UPDATE candidate_details
+SET analyzed_hash = content_hash, analyzed_at = updated_at
+WHERE analyzed_hash IS NULL AND score_source IN ('llm', 'rules');
+
+CREATE INDEX IF NOT EXISTS idx_candidate_details_pending_analysis
+    ON candidate_details(candidate_id)
+    WHERE analyzed_hash IS DISTINCT FROM content_hash;
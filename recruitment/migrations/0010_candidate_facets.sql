@@ -0,0 +1,73 @@
+-- Indexed facets for /api/candidates/search: tag arrays with one normalized
+-- keyword per extracted label (see profile_tags() in tools/extractor.py), the
+-- US state parsed from the location (location_state() in tools/scoring.py)
+-- and a full-text document over the scraped fields.
+ALTER TABLE candidate_details
+    ADD COLUMN IF NOT EXISTS certification_tags TEXT[] NOT NULL DEFAULT '{}',
+    ADD COLUMN IF NOT EXISTS skill_tags TEXT[] NOT NULL DEFAULT '{}',
+    ADD COLUMN IF NOT EXISTS workplace_tags TEXT[] NOT NULL DEFAULT '{}',
+    ADD COLUMN IF NOT EXISTS location_state TEXT,
+    ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- Backfill from the comma-joined labels written by earlier versions
+UPDATE candidate_details cd
+SET
+    certification_tags = ARRAY(
+        SELECT DISTINCT m.tag
+        FROM unnest(string_to_array(cd.certifications, ', ')) AS l(label)
+        JOIN (VALUES
+        ('Certified Pharmacy Technician (CPhT)', 'cpht'),
+        ('Pharmacy Technician Certification Board (PTCB) certified', 'ptcb'),
+        ('Exam for the Certification of Pharmacy Technicians (ExCPT)', 'excpt'),
+        ('National Healthcareer Association certified', 'nha'),
+        ('Certified Pharmacy Technician', 'certified')
+        ) AS m(label, tag) USING (label)
+    ),
+    skill_tags = ARRAY(
+        SELECT DISTINCT m.tag
+        FROM unnest(string_to_array(cd.skills, ', ')) AS l(label)
+        JOIN (VALUES
+        ('retail pharmacy', 'retail'),
+        ('hospital pharmacy', 'hospital'),
+        ('medication compounding', 'compounding'),
+        ('inventory management', 'inventory'),
+        ('insurance billing', 'billing'),
+        ('sterile compounding', 'sterile'),
+        ('IV preparation', 'iv'),
+        ('customer service', 'customer service'),
+        ('electronic medical records', 'emr')
+        ) AS m(label, tag) USING (label)
+    ),
+    workplace_tags = ARRAY(
+        SELECT DISTINCT m.tag
+        FROM unnest(string_to_array(cd.workplace, ', ')) AS l(label)
+        JOIN (VALUES
+        ('Hospital', 'hospital'),
+        ('Retail Pharmacy', 'retail'),
+        ('Clinical Setting', 'clinic'),
+        ('Pharmacy', 'pharmacy'),
+        ('Drugstore', 'drugstore'),
+        ('CVS Pharmacy', 'cvs'),
+        ('Walgreens', 'walgreens'),
+        ('Rite Aid', 'rite aid'),
+        ('Walmart Pharmacy', 'walmart'),
+        ('Long-term Care Facility', 'long-term care')
+        ) AS m(label, tag) USING (label)
+    ),
+    search_vector = to_tsvector('english', concat_ws(' ',
+        c.name, c.position, c.location, cd.experience, cd.certifications, cd.skills, cd.workplace))
+FROM candidates c
+WHERE c.id = cd.candidate_id;
+
+-- location_state is backfilled by 0012_location_state_backfill.sql
+
+CREATE INDEX IF NOT EXISTS idx_candidate_details_certification_tags
+    ON candidate_details USING GIN (certification_tags);
+CREATE INDEX IF NOT EXISTS idx_candidate_details_skill_tags
+    ON candidate_details USING GIN (skill_tags);
+CREATE INDEX IF NOT EXISTS idx_candidate_details_workplace_tags
+    ON candidate_details USING GIN (workplace_tags);
+CREATE INDEX IF NOT EXISTS idx_candidate_details_search_vector
+    ON candidate_details USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_candidate_details_state_score
+    ON candidate_details(location_state, score DESC, candidate_id DESC);
@@ -0,0 +1,5 @@
+-- Span tree of each job run and, for jobs queued with profile=true, its
+-- sampled stacks in folded format. Kept out of result so job status polls
+-- do not read them.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS trace JSONB;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS profile TEXT;
@@ -0,0 +1,75 @@
+-- Recompute location_state with the same rules as location_state() in
+-- tools/scoring.py, so existing rows match newly ingested ones:
+-- 1. a comma-separated part that is exactly a state name or code, the last
+--    one first ("Kansas City, Missouri" is MO);
+-- 2. otherwise the first state name in the text, the longest at that position;
+-- 3. otherwise the first state code following a comma ("Austin, TX 78701").
+CREATE TEMPORARY TABLE us_states (name TEXT PRIMARY KEY, code TEXT NOT NULL) ON COMMIT DROP;
+INSERT INTO us_states (name, code) VALUES
+    ('alabama', 'AL'),
+    ('alaska', 'AK'),
+    ('arizona', 'AZ'),
+    ('arkansas', 'AR'),
+    ('california', 'CA'),
+    ('colorado', 'CO'),
+    ('connecticut', 'CT'),
+    ('delaware', 'DE'),
+    ('florida', 'FL'),
+    ('georgia', 'GA'),
+    ('hawaii', 'HI'),
+    ('idaho', 'ID'),
+    ('illinois', 'IL'),
+    ('indiana', 'IN'),
+    ('iowa', 'IA'),
+    ('kansas', 'KS'),
+    ('kentucky', 'KY'),
+    ('louisiana', 'LA'),
+    ('maine', 'ME'),
+    ('maryland', 'MD'),
+    ('massachusetts', 'MA'),
+    ('michigan', 'MI'),
+    ('minnesota', 'MN'),
+    ('mississippi', 'MS'),
+    ('missouri', 'MO'),
+    ('montana', 'MT'),
+    ('nebraska', 'NE'),
+    ('nevada', 'NV'),
+    ('new hampshire', 'NH'),
+    ('new jersey', 'NJ'),
+    ('new mexico', 'NM'),
+    ('new york', 'NY'),
+    ('north carolina', 'NC'),
+    ('north dakota', 'ND'),
+    ('ohio', 'OH'),
+    ('oklahoma', 'OK'),
+    ('oregon', 'OR'),
+    ('pennsylvania', 'PA'),
+    ('rhode island', 'RI'),
+    ('south carolina', 'SC'),
+    ('south dakota', 'SD'),
+    ('tennessee', 'TN'),
+    ('texas', 'TX'),
+    ('utah', 'UT'),
+    ('vermont', 'VT'),
+    ('virginia', 'VA'),
+    ('washington', 'WA'),
+    ('west virginia', 'WV'),
+    ('wisconsin', 'WI'),
+    ('wyoming', 'WY'),
+    ('district of columbia', 'DC'),
+    ('puerto rico', 'PR');
+
+UPDATE candidate_details cd
+SET location_state = COALESCE(
+    (SELECT s.code
+     FROM unnest(string_to_array(c.location, ',')) WITH ORDINALITY AS p(part, n)
+     JOIN us_states s ON lower(btrim(p.part, E' \t\r\n')) = s.name OR btrim(p.part, E' \t\r\n') = s.code
+     ORDER BY p.n DESC LIMIT 1),
+    (SELECT s.code FROM us_states s
+     WHERE lower(c.location) ~ ('\m' || s.name || '\M')
+     ORDER BY length(substring(lower(c.location) FROM ('^(.*?)\m' || s.name || '\M'))), length(s.name) DESC
+     LIMIT 1),
+    substring(c.location FROM (SELECT ',\s*(' || string_agg(code, '|') || ')\M' FROM us_states))
+)
+FROM candidates c
+WHERE c.id = cd.candidate_id;
@@ -0,0 +1,110 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .database import Database
+
+
+class AsyncDatabase:
+    """Awaitable facade with the same query methods as ``Database``.
+
+    Every call checks a pooled connection out, runs the synchronous psycopg2
+    query on a bounded thread pool and hands the connection back, so the
+    event loop is never blocked by the database. The thread pool defaults to
+    the connection pool's ``max_size``.
+
+    ``stream`` holds its connection between batches, outside any thread, so
+    at most ``max_streams`` streams run at once (half the pool by default);
+    the rest of the pool stays free for ordinary queries.
+    """
+
+    def __init__(self, max_workers=None, max_streams=None):
+        pool_size = int(os.environ.get("POSTGRES_POOL_MAX_SIZE", "10"))
+        if max_workers is None:
+            max_workers = int(os.environ.get("POSTGRES_ASYNC_WORKERS", str(pool_size)))
+        if max_streams is None:
+            max_streams = int(os.environ.get("POSTGRES_MAX_STREAMS", str(max(1, pool_size // 2))))
+        self.max_streams = max_streams
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        # Created on first use so it belongs to the server's event loop
+        self._streams = None
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(db, *args, **kwargs)`` with a pooled ``Database`` off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self._call, fn, *args, **kwargs))
+
+    async def stream(self, open_cursor, *args, batch_size=2000):
+        """Yield lists of rows from the cursor ``open_cursor(db, *args)`` returns.
+
+        One pooled connection is held until the generator is exhausted or
+        closed; each batch is fetched off the event loop. The connection goes
+        back to the pool even when the consumer is cancelled, e.g. by a client
+        disconnecting mid-download. Waits while ``max_streams`` streams are
+        open; callers that would rather refuse check ``stream_available()``.
+        """
+        slots = self._stream_slots()
+        await slots.acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            checkout = loop.run_in_executor(self._executor, Database)
+            try:
+                db = await asyncio.shield(checkout)
+            except asyncio.CancelledError:
+                checkout.add_done_callback(self._close_checked_out)
+                raise
+            cursor = None
+            try:
+                cursor = await loop.run_in_executor(self._executor, partial(open_cursor, db, *args))
+                while True:
+                    rows = await loop.run_in_executor(self._executor, cursor.fetchmany, batch_size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                # Shielded: a cancelled await would otherwise drop the queued close and leak the connection
+                await asyncio.shield(loop.run_in_executor(self._executor, self._close, db, cursor))
+        finally:
+            slots.release()
+
+    def stream_available(self):
+        """Whether ``stream`` would start without waiting for another stream to finish"""
+        return self._streams is None or not self._streams.locked()
+
+    def _stream_slots(self):
+        if self._streams is None:
+            self._streams = asyncio.Semaphore(self.max_streams)
+        return self._streams
+
+    def _close_checked_out(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self._executor.submit(future.result().close)
+
+    @staticmethod
+    def _close(db, cursor):
+        try:
+            if cursor is not None and not cursor.closed:
+                cursor.close()
+        finally:
+            db.close()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    @staticmethod
+    def _call(fn, *args, **kwargs):
+        with Database() as db:
+            return fn(db, *args, **kwargs)
+
+    def __getattr__(self, name):
+        method = getattr(Database, name, None)
+        if name.startswith("_") or not callable(method):
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
@@ -1,41 +1,203 @@
+import contextvars
 import os
+import threading
+import time
 import urllib
-from selenium.webdriver.common.by import By
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from .driver import Driver
+from . import metrics
+from .driver import Driver, DriverPool, wait_times
+from .progress import emit
+from .tracing import span
 
-class Client:
-  def __init__(self):
-    url = 'https://linkedin.com/'
-    cookie = {
-      "name": "li_at",
-      "value": os.environ["LINKEDIN_COOKIE"],
-      "domain": ".linkedin.com"
-    }
+LINKEDIN_URL = 'https://linkedin.com/'
+RESULT_CARD_SELECTOR = "ul li div div.linked-area"
+# Shown instead of result cards past the last page of results
+NO_RESULTS_SELECTOR = "div.search-reusable-search-no-results, section.artdeco-empty-state"
+# Loads of a result page before it is given up on as not ready
+PAGE_ATTEMPTS = 2
+
+# Reads every result card in one WebDriver round trip. Fields that are
+# missing from a card come back as null.
+EXTRACT_CARDS_SCRIPT = """
+const text = (card, selector) => {
+  const element = card.querySelector(selector);
+  return element ? element.innerText.trim() : null;
+};
+return Array.from(document.querySelectorAll(arguments[0]), card => {
+  const link = card.querySelector("a.app-aware-link");
+  return {
+    name: text(card, "span.entity-result__title-line"),
+    position: text(card, "div.entity-result__primary-subtitle"),
+    location: text(card, "div.entity-result__secondary-subtitle"),
+    profile_link: link ? link.href : null
+  };
+});
+"""
+
+def linkedin_cookie():
+  return {
+    "name": "li_at",
+    "value": os.environ["LINKEDIN_COOKIE"],
+    "domain": ".linkedin.com"
+  }
+
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+
+def get_driver_pool():
+  """Return the process-wide pool of authenticated LinkedIn browser sessions"""
+  global _driver_pool
+  with _driver_pool_lock:
+    if _driver_pool is None:
+      _driver_pool = DriverPool(
+        LINKEDIN_URL,
+        linkedin_cookie(),
+        size=int(os.environ.get("LINKEDIN_DRIVER_POOL_SIZE", "2")),
+        max_navigations=int(os.environ.get("LINKEDIN_DRIVER_MAX_NAVIGATIONS", "100")),
+        timeout=float(os.environ.get("LINKEDIN_DRIVER_CHECKOUT_TIMEOUT", "300")),
+      )
+    return _driver_pool
 
-    self.driver = Driver(url, cookie)
+def close_driver_pool():
+  """Shut down the process-wide driver pool's browsers, if the pool was created"""
+  global _driver_pool
+  with _driver_pool_lock:
+    pool, _driver_pool = _driver_pool, None
+  if pool is not None:
+    pool.close()
 
-  def find_people(self, skills):
+def browser_stats():
+  """Browser pool occupancy and recent page readiness waits of this process"""
+  with _driver_pool_lock:
+    pool = _driver_pool
+  return {
+    "pool": pool.stats() if pool is not None else None,
+    "waits": wait_times.stats(),
+  }
+
+class Client:
+  def __init__(self, driver=None):
+    """Search LinkedIn with ``driver``, or with a dedicated browser when none is given"""
+    self._owns_driver = driver is None
+    self.driver = driver if driver is not None else Driver(LINKEDIN_URL, linkedin_cookie())
+
+  @staticmethod
+  def search_url(skills, page=1):
     skills = skills.split(",")
     search = " ".join(skills)
     encoded_string = urllib.parse.quote(search.lower())
     url = f"https://www.linkedin.com/search/results/people/?keywords={encoded_string}"
-    self.driver.navigate(url)
+    if page > 1:
+      url = f"{url}&page={page}"
+    return url
+
+  def find_people(self, skills, page=1):
+    """Profiles on one result page, or None if it was not ready before the page timeout.
 
-    people = self.driver.get_elements("ul li div div.linked-area")
+    The page is ready once it shows result cards or LinkedIn's no-results
+    message, so a page past the last one returns [] rather than timing out.
+    A page that timed out with cards on it still returns those cards.
+    """
+    with metrics.timer(metrics.FIND_PEOPLE_SECONDS, errors=metrics.FIND_PEOPLE_ERRORS):
+      ready = self.driver.navigate(
+        self.search_url(skills, page), wait_for=f"{RESULT_CARD_SELECTOR}, {NO_RESULTS_SELECTOR}"
+      )
+
+      people = self.extract_cards()
+      if not people and not ready:
+        return None
+      return people
+
+  def extract_cards(self):
+    """Read all result cards on the current page as profile dicts.
+
+    Cards without a name or profile link (ads, placeholders, private
+    profiles) are skipped; a missing position or location becomes "".
+    """
+    with span("extract_cards"):
+      cards = self.driver.execute_script(EXTRACT_CARDS_SCRIPT, RESULT_CARD_SELECTOR) or []
 
     results = []
-    for person in people:
-      try:
-        result = {}
-        result["name"] = person.find_element(By.CSS_SELECTOR, "span.entity-result__title-line").text
-        result["position"] = person.find_element(By.CSS_SELECTOR, "div.entity-result__primary-subtitle").text
-        result["location"] = person.find_element(By.CSS_SELECTOR, "div.entity-result__secondary-subtitle").text
-        result["profile_link"] = person.find_element(By.CSS_SELECTOR, "a.app-aware-link").get_attribute("href")
-      except Exception as e:
-        print(e)
-      results.append(result)
+    for card in cards:
+      if not card.get("name") or not card.get("profile_link"):
+        continue
+      results.append({
+        "name": card["name"],
+        "position": card.get("position") or "",
+        "location": card.get("location") or "",
+        "profile_link": card["profile_link"],
+      })
     return results
 
   def close(self):
-    self.driver.close()
+    if self._owns_driver:
+      self.driver.close()
+
+
+def search_people(criteria, max_pages=1, concurrency=1, target_count=None, pool=None):
+  """Walk up to ``max_pages`` result pages, yielding ``(page, people)`` as each page is read.
+
+  Pages are fetched by ``concurrency`` threads, each with its own session from
+  the driver pool, and yielded in completion order so the caller can store
+  early pages while later ones load. Profiles already yielded are dropped from
+  later pages. A page that is still not ready after ``PAGE_ATTEMPTS`` loads, or
+  whose fetch raised, is skipped. The walk stops at the first page that loaded without results or
+  once ``target_count`` profiles have been yielded.
+  """
+  pool = pool or get_driver_pool()
+  concurrency = max(1, min(concurrency, max_pages))
+
+  def fetch(page):
+    start = time.monotonic()
+    with span("page", page=page), pool.session() as driver:
+      acquired = time.monotonic()
+      emit("driver_acquired", page=page, wait_s=round(acquired - start, 3))
+      client = Client(driver)
+      for attempt in range(1, PAGE_ATTEMPTS + 1):
+        people = client.find_people(criteria, page)
+        if people is not None:
+          break
+        emit("page_not_ready", page=page, attempt=attempt)
+    emit("page_scraped", page=page, profiles=len(people or ()), ready=people is not None,
+         duration_s=round(time.monotonic() - acquired, 3))
+    return people
+
+  executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="linkedin-page")
+  pending = {}
+  next_page = 1
+  exhausted = False
+  seen = set()
+  found = 0
+  try:
+    while True:
+      while not exhausted and next_page <= max_pages and len(pending) < concurrency:
+        # Each page runs in a copy of the caller's context so its events reach the right job
+        pending[executor.submit(contextvars.copy_context().run, fetch, next_page)] = next_page
+        next_page += 1
+      if not pending:
+        return
+
+      done, _ = wait(pending, return_when=FIRST_COMPLETED)
+      for future in sorted(done, key=pending.get):
+        page = pending.pop(future)
+        try:
+          people = future.result()
+        except Exception as e:
+          emit("page_failed", page=page, error=f"{type(e).__name__}: {e}")
+          continue
+        if people is None:
+          # Timed out, not empty: later pages may still have results
+          continue
+        if not people:
+          exhausted = True
+          continue
+        new_people = [p for p in people if p["profile_link"] not in seen]
+        seen.update(p["profile_link"] for p in new_people)
+        if new_people:
+          found += len(new_people)
+          yield page, new_people
+        if target_count and found >= target_count:
+          return
+  finally:
+    executor.shutdown(wait=False, cancel_futures=True)
@@ -1,124 +1,155 @@
-import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import hashlib
+import uuid
+from psycopg2.extras import Json, RealDictCursor, execute_values, register_uuid
 from datetime import datetime
 
+from . import metrics
+from .pool import get_pool
+from .query_cache import get_query_cache
+from .tracing import trace_methods
+
+register_uuid()
+
+# Scraped fields whose change makes a candidate due for analysis again
+CONTENT_FIELDS = ("name", "position", "location", "experience", "certifications", "skills", "workplace")
+
+
+def content_hash(row):
+    """Hash of a candidate's scraped fields; matches the SQL backfill in migration 0009"""
+    return hashlib.md5("\x1f".join(row.get(field) or "" for field in CONTENT_FIELDS).encode()).hexdigest()
+
+
 class Database:
-    def __init__(self):
-        self.conn = psycopg2.connect(
-            host=os.environ.get("POSTGRES_HOST", "localhost"),
-            database=os.environ.get("POSTGRES_DB", "pharmacy_tech_db"),
-            user=os.environ.get("POSTGRES_USER", "postgres"),
-            password=os.environ.get("POSTGRES_PASSWORD", "postgres"),
-            port=os.environ.get("POSTGRES_PORT", "5432")
-        )
+    def __init__(self, pool=None):
+        """Check a connection out of the shared pool.
+
+        Call ``close()`` (or use the instance as a context manager) to hand
+        the connection back to the pool. The schema is managed by
+        ``recruitment.migrate`` and is not touched here.
+        """
+        self.pool = pool or get_pool()
+        self.conn = self.pool.getconn()
         self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
-        self.create_tables()
-
-    def create_tables(self):
-        """Create necessary tables if they don't exist"""
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS candidates (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255),
-                position VARCHAR(255),
-                location VARCHAR(255),
-                profile_link VARCHAR(255) UNIQUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS candidate_details (
-                id SERIAL PRIMARY KEY,
-                candidate_id INTEGER REFERENCES candidates(id),
-                experience TEXT,
-                certifications TEXT,
-                skills TEXT,
-                workplace TEXT,
-                score DECIMAL(3,1),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS outreach (
-                id SERIAL PRIMARY KEY,
-                candidate_id INTEGER REFERENCES candidates(id),
-                message_template TEXT,
-                strategy TEXT,
-                status VARCHAR(50) DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Add indexes for better performance
-        self.cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_candidate_score ON candidate_details(score DESC)
-        ''')
-        
-        self.cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_candidate_location ON candidates(location)
-        ''')
-        
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _commit_candidate_changes(self):
+        """Commit a write to the candidate tables and drop cached reads of them"""
         self.conn.commit()
+        get_query_cache().invalidate()
+
+    def upsert_candidates(self, rows, page_size=500):
+        """Insert or update a batch of candidates and their details in one transaction.
+
+        Each row is a dict with the candidate fields (name, position, location,
+        profile_link) and the extracted details (experience, certifications,
+        skills, workplace) plus, optionally, the facet values
+        (certification_tags, skill_tags, workplace_tags, location_state).
+        Rows are keyed by profile_link, later rows winning,
+        and rows without one are skipped. Existing scores are left untouched;
+        a candidate whose fields changed becomes pending analysis again.
+        Returns a dict mapping profile_link to candidate id.
+        """
+        unique_rows = {}
+        for row in rows:
+            if row.get('profile_link'):
+                unique_rows[row['profile_link']] = row
+        if not unique_rows:
+            return {}
+        # Batches lock overlapping rows in the same order; the data_version row (migration 0006)
+        # serializes the aggregate triggers behind them, so concurrent batches cannot deadlock
+        ordered = sorted(unique_rows.items())
 
-    def insert_candidate(self, name, position, location, profile_link):
-        """Insert a new candidate into the database"""
         try:
-            self.cursor.execute(
-                "INSERT INTO candidates (name, position, location, profile_link) VALUES (%s, %s, %s, %s) RETURNING id",
-                (name, position, location, profile_link)
-            )
-            candidate_id = self.cursor.fetchone()['id']
-            self.conn.commit()
-            return candidate_id
-        except psycopg2.errors.UniqueViolation:
+            returned = execute_values(self.cursor, """
+                INSERT INTO candidates (name, position, location, profile_link)
+                VALUES %s
+                ON CONFLICT (profile_link) DO UPDATE
+                SET name = EXCLUDED.name, position = EXCLUDED.position, location = EXCLUDED.location
+                RETURNING id, profile_link
+            """, [
+                (r['name'], r['position'], r['location'], link)
+                for link, r in ordered
+            ], page_size=page_size, fetch=True)
+            candidate_ids = {r['profile_link']: r['id'] for r in returned}
+
+            execute_values(self.cursor, """
+                INSERT INTO candidate_details
+                    (candidate_id, experience, certifications, skills, workplace, score, content_hash,
+                     certification_tags, skill_tags, workplace_tags, location_state, search_vector)
+                VALUES %s
+                ON CONFLICT (candidate_id) DO UPDATE
+                SET experience = EXCLUDED.experience, certifications = EXCLUDED.certifications,
+                    skills = EXCLUDED.skills, workplace = EXCLUDED.workplace,
+                    content_hash = EXCLUDED.content_hash, certification_tags = EXCLUDED.certification_tags,
+                    skill_tags = EXCLUDED.skill_tags, workplace_tags = EXCLUDED.workplace_tags,
+                    location_state = EXCLUDED.location_state, search_vector = EXCLUDED.search_vector,
+                    updated_at = CURRENT_TIMESTAMP
+            """, [
+                (candidate_ids[link], r['experience'], r['certifications'], r['skills'], r['workplace'], 0.0,
+                 content_hash(r), r.get('certification_tags') or [], r.get('skill_tags') or [],
+                 r.get('workplace_tags') or [], r.get('location_state'),
+                 " ".join(r.get(field) or "" for field in CONTENT_FIELDS))
+                for link, r in ordered
+            ], template="(%s, %s, %s, %s, %s, %s, %s, %s::text[], %s::text[], %s::text[], %s, to_tsvector('english', %s))",
+               page_size=page_size)
+
+            self._commit_candidate_changes()
+        except Exception:
             self.conn.rollback()
-            self.cursor.execute("SELECT id FROM candidates WHERE profile_link = %s", (profile_link,))
-            return self.cursor.fetchone()['id']
+            raise
+        return candidate_ids
+
+    def update_scores(self, scores, page_size=500):
+        """Set many scores in one statement.
 
-    def insert_candidate_details(self, candidate_id, experience, certifications, skills, workplace, score=0.0):
-        """Insert candidate details"""
+        ``scores`` holds ``(candidate_id, score, source)`` tuples. Scores set by
+        the LLM analyzer are only overwritten by other 'llm' scores. Final
+        scores ('rules' and 'llm') mark the candidate's current content as
+        analyzed. Returns the set of candidate ids that were updated.
+        """
+        scores = list(scores)
+        if not scores:
+            return set()
         try:
-            self.cursor.execute(
-                "INSERT INTO candidate_details (candidate_id, experience, certifications, skills, workplace, score) VALUES (%s, %s, %s, %s, %s, %s)",
-                (candidate_id, experience, certifications, skills, workplace, score)
-            )
-            self.conn.commit()
-        except Exception as e:
+            returned = execute_values(self.cursor, """
+                UPDATE candidate_details AS cd
+                SET score = v.score, score_source = v.source, updated_at = CURRENT_TIMESTAMP,
+                    analyzed_hash = CASE WHEN v.source = 'review' THEN cd.analyzed_hash ELSE cd.content_hash END,
+                    analyzed_at = CASE WHEN v.source = 'review' THEN cd.analyzed_at ELSE CURRENT_TIMESTAMP END
+                FROM (VALUES %s) AS v(candidate_id, score, source)
+                WHERE cd.candidate_id = v.candidate_id
+                  AND (v.source = 'llm' OR cd.score_source IS DISTINCT FROM 'llm')
+                RETURNING cd.candidate_id
+            """, scores, template="(%s::integer, %s::numeric, %s)", page_size=page_size, fetch=True)
+            updated = {r['candidate_id'] for r in returned}
+            self._commit_candidate_changes()
+        except Exception:
             self.conn.rollback()
-            self.update_candidate_details(candidate_id, experience, certifications, skills, workplace)
-            self.update_candidate_score(candidate_id, score)
+            raise
+        return updated
 
-    def update_candidate_details(self, candidate_id, experience, certifications, skills, workplace):
-        """Update candidate details"""
-        self.cursor.execute("""
-            UPDATE candidate_details
-            SET experience = %s, certifications = %s, skills = %s, workplace = %s, updated_at = %s
-            WHERE candidate_id = %s
-        """, (experience, certifications, skills, workplace, datetime.now(), candidate_id))
-        
-        if self.cursor.rowcount == 0:
-            # No existing record to update, insert a new one
-            self.insert_candidate_details(candidate_id, experience, certifications, skills, workplace)
-        else:
-            self.conn.commit()
+    def update_candidate_score(self, candidate_id, score, source="llm"):
+        """Update candidate score; returns False if the candidate has no stored profile.
 
-    def update_candidate_score(self, candidate_id, score):
-        """Update candidate score"""
+        Candidates and their details are only created by ``upsert_candidates``,
+        which also derives the change-tracking and search columns.
+        """
         self.cursor.execute("""
             UPDATE candidate_details
-            SET score = %s, updated_at = %s
+            SET score = %s, score_source = %s, updated_at = %s,
+                analyzed_hash = content_hash, analyzed_at = CURRENT_TIMESTAMP
             WHERE candidate_id = %s
-        """, (score, datetime.now(), candidate_id))
-        
+        """, (score, source, datetime.now(), candidate_id))
         if self.cursor.rowcount == 0:
-            # No existing record to update, insert a new one with placeholder values
-            self.insert_candidate_details(candidate_id, "", "", "", "", score)
-        else:
-            self.conn.commit()
+            self.conn.rollback()
+            return False
+        self._commit_candidate_changes()
+        return True
 
     def insert_outreach_strategy(self, candidate_id, message_template, strategy):
         """Insert outreach strategy for a candidate"""
@@ -128,29 +159,182 @@ class Database:
         )
         self.conn.commit()
 
-    def get_candidates(self, limit=100, offset=0):
-        """Get candidates with their details"""
-        self.cursor.execute("""
-            SELECT c.*, cd.experience, cd.certifications, cd.skills, cd.workplace, cd.score
-            FROM candidates c
-            LEFT JOIN candidate_details cd ON c.id = cd.candidate_id
-            ORDER BY c.id DESC
-            LIMIT %s OFFSET %s
-        """, (limit, offset))
+    def insert_outreach_strategies(self, strategies, page_size=500):
+        """Insert many outreach strategies in one transaction.
+
+        ``strategies`` holds ``(candidate_id, message_template, strategy)``
+        tuples; those for unknown candidates are skipped. Returns the set of
+        candidate ids a strategy was inserted for.
+        """
+        strategies = list(strategies)
+        if not strategies:
+            return set()
+        try:
+            returned = execute_values(self.cursor, """
+                INSERT INTO outreach (candidate_id, message_template, strategy)
+                SELECT v.candidate_id, v.message_template, v.strategy
+                FROM (VALUES %s) AS v(candidate_id, message_template, strategy)
+                JOIN candidates c ON c.id = v.candidate_id
+                RETURNING candidate_id
+            """, strategies, template="(%s::integer, %s, %s)", page_size=page_size, fetch=True)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return {r['candidate_id'] for r in returned}
+
+    def get_candidates(self, limit=100, offset=0, after_id=None):
+        """Get candidates with their details, newest first.
+
+        Pass the last id of the previous page as ``after_id`` to page by key
+        instead of by offset; ``offset`` is ignored in that case.
+        """
+        if after_id is not None:
+            self.cursor.execute("""
+                SELECT c.*, cd.experience, cd.certifications, cd.skills, cd.workplace, cd.score
+                FROM candidates c
+                LEFT JOIN candidate_details cd ON c.id = cd.candidate_id
+                WHERE c.id < %s
+                ORDER BY c.id DESC
+                LIMIT %s
+            """, (after_id, limit))
+        else:
+            self.cursor.execute("""
+                SELECT c.*, cd.experience, cd.certifications, cd.skills, cd.workplace, cd.score
+                FROM candidates c
+                LEFT JOIN candidate_details cd ON c.id = cd.candidate_id
+                ORDER BY c.id DESC
+                LIMIT %s OFFSET %s
+            """, (limit, offset))
         return self.cursor.fetchall()
 
-    def get_top_candidates(self, limit=10):
-        """Get top candidates based on score"""
-        self.cursor.execute("""
+    def get_top_candidates(self, limit=10, after=None):
+        """Get top candidates based on score.
+
+        Pass the ``(score, id)`` of the last candidate of the previous page as
+        ``after`` to continue from there.
+        """
+        if after is not None:
+            self.cursor.execute("""
+                SELECT c.*, cd.experience, cd.certifications, cd.skills, cd.workplace, cd.score
+                FROM candidates c
+                JOIN candidate_details cd ON c.id = cd.candidate_id
+                WHERE cd.score IS NOT NULL AND (cd.score, cd.candidate_id) < (%s, %s)
+                ORDER BY cd.score DESC, cd.candidate_id DESC
+                LIMIT %s
+            """, (after[0], after[1], limit))
+        else:
+            self.cursor.execute("""
+                SELECT c.*, cd.experience, cd.certifications, cd.skills, cd.workplace, cd.score
+                FROM candidates c
+                JOIN candidate_details cd ON c.id = cd.candidate_id
+                WHERE cd.score IS NOT NULL
+                ORDER BY cd.score DESC, cd.candidate_id DESC
+                LIMIT %s
+            """, (limit,))
+        return self.cursor.fetchall()
+
+    def _facet_filters(self, query=None, certifications=(), skills=(), workplaces=(), states=(), min_score=None):
+        """WHERE clause and parameters for search_candidates and get_search_facets.
+
+        Tag filters require every listed tag; states match any listed state.
+        """
+        clauses, params = ["cd.score IS NOT NULL"], []
+        for column, tags in [("certification_tags", certifications), ("skill_tags", skills),
+                             ("workplace_tags", workplaces)]:
+            if tags:
+                clauses.append(f"cd.{column} @> %s::text[]")
+                params.append(list(tags))
+        if states:
+            clauses.append("cd.location_state = ANY(%s)")
+            params.append(list(states))
+        if min_score is not None:
+            clauses.append("cd.score >= %s")
+            params.append(min_score)
+        if query:
+            clauses.append("cd.search_vector @@ websearch_to_tsquery('english', %s)")
+            params.append(query)
+        return " AND ".join(clauses), params
+
+    def search_candidates(self, limit=20, after=None, **filters):
+        """Candidates matching the facet filters, best score first.
+
+        Pass the ``(score, id)`` of the last candidate of the previous page as
+        ``after`` to continue from there.
+        """
+        where, params = self._facet_filters(**filters)
+        if after is not None:
+            where += " AND (cd.score, cd.candidate_id) < (%s, %s)"
+            params.extend(after)
+        self.cursor.execute(f"""
             SELECT c.*, cd.experience, cd.certifications, cd.skills, cd.workplace, cd.score
-            FROM candidates c
-            JOIN candidate_details cd ON c.id = cd.candidate_id
-            WHERE cd.score IS NOT NULL
-            ORDER BY cd.score DESC
+            FROM candidate_details cd
+            JOIN candidates c ON c.id = cd.candidate_id
+            WHERE {where}
+            ORDER BY cd.score DESC, cd.candidate_id DESC
             LIMIT %s
-        """, (limit,))
+        """, (*params, limit))
         return self.cursor.fetchall()
 
+    def get_search_facets(self, top=20, **filters):
+        """Match count and per-value counts of each facet over the candidates matching the filters.
+
+        Aggregates every matching row, so unlike ``search_candidates`` its cost
+        grows with the number of matches; the API only runs it on request.
+        """
+        where, params = self._facet_filters(**filters)
+        self.cursor.execute(f"""
+            WITH matched AS (
+                SELECT cd.certification_tags, cd.skill_tags, cd.workplace_tags, cd.location_state
+                FROM candidate_details cd
+                WHERE {where}
+            ), counts AS (
+                SELECT 'certification' AS facet, tag AS value, count(*) AS count
+                FROM matched, unnest(certification_tags) AS tag GROUP BY tag
+                UNION ALL
+                SELECT 'skill', tag, count(*) FROM matched, unnest(skill_tags) AS tag GROUP BY tag
+                UNION ALL
+                SELECT 'workplace', tag, count(*) FROM matched, unnest(workplace_tags) AS tag GROUP BY tag
+                UNION ALL
+                SELECT 'state', location_state, count(*) FROM matched
+                WHERE location_state IS NOT NULL GROUP BY location_state
+            )
+            SELECT 'total' AS facet, NULL AS value, count(*) AS count FROM matched
+            UNION ALL
+            SELECT facet, value, count FROM (
+                SELECT *, row_number() OVER (PARTITION BY facet ORDER BY count DESC, value) AS rank FROM counts
+            ) ranked
+            WHERE rank <= %s
+            ORDER BY count DESC, value
+        """, (*params, top))
+        facets = {"certification": {}, "skill": {}, "workplace": {}, "state": {}}
+        total = 0
+        for row in self.cursor.fetchall():
+            if row['facet'] == 'total':
+                total = row['count']
+            else:
+                facets[row['facet']][row['value']] = row['count']
+        return {"total": total, "facets": facets}
+
+    def open_export_cursor(self, itersize=2000):
+        """Open a server-side cursor over every candidate and its details, in ID order.
+
+        Rows are fetched from the server ``itersize`` at a time, so memory
+        stays flat regardless of table size. The cursor lives in the current
+        transaction; ``close()`` ends it.
+        """
+        cursor = self.conn.cursor(name=f"candidate_export_{uuid.uuid4().hex}", cursor_factory=RealDictCursor)
+        cursor.itersize = itersize
+        cursor.execute("""
+            SELECT c.id, c.name, c.position, c.location, c.profile_link,
+                   cd.experience, cd.certifications, cd.skills, cd.workplace, cd.score, cd.score_source,
+                   c.created_at, cd.updated_at
+            FROM candidates c
+            LEFT JOIN candidate_details cd ON c.id = cd.candidate_id
+            ORDER BY c.id
+        """)
+        return cursor
+
     def get_candidate_by_id(self, candidate_id):
         """Get a specific candidate by ID"""
         self.cursor.execute("""
@@ -161,50 +345,178 @@ class Database:
         """, (candidate_id,))
         return self.cursor.fetchone()
 
+    def get_candidates_by_ids(self, candidate_ids):
+        """Get the candidates with the given IDs, in ID order; unknown IDs are skipped"""
+        self.cursor.execute("""
+            SELECT c.*, cd.experience, cd.certifications, cd.skills, cd.workplace, cd.score
+            FROM candidates c
+            LEFT JOIN candidate_details cd ON c.id = cd.candidate_id
+            WHERE c.id = ANY(%s)
+            ORDER BY c.id
+        """, (list(candidate_ids),))
+        return self.cursor.fetchall()
+
+    def get_pending_analysis(self, limit=100):
+        """Get candidates that are new or changed since they were last analyzed, oldest first"""
+        self.cursor.execute("""
+            SELECT c.*, cd.experience, cd.certifications, cd.skills, cd.workplace, cd.score
+            FROM candidate_details cd
+            JOIN candidates c ON c.id = cd.candidate_id
+            WHERE cd.analyzed_hash IS DISTINCT FROM cd.content_hash
+            ORDER BY cd.candidate_id
+            LIMIT %s
+        """, (limit,))
+        return self.cursor.fetchall()
+
+    def get_pending_ids(self, candidate_ids):
+        """Of ``candidate_ids``, the set that is new or changed since it was last analyzed"""
+        self.cursor.execute("""
+            SELECT candidate_id FROM candidate_details
+            WHERE candidate_id = ANY(%s) AND analyzed_hash IS DISTINCT FROM content_hash
+        """, (list(candidate_ids),))
+        return {r['candidate_id'] for r in self.cursor.fetchall()}
+
+    def get_data_version(self):
+        """Get the counter that database triggers bump on every candidate write"""
+        self.cursor.execute("SELECT version FROM data_version WHERE id = 1")
+        row = self.cursor.fetchone()
+        return row['version'] if row else None
+
     def get_statistics(self):
-        """Get database statistics"""
-        stats = {}
-        
-        # Total candidates
-        self.cursor.execute("SELECT COUNT(*) as count FROM candidates")
-        stats['total_candidates'] = self.cursor.fetchone()['count']
-        
-        # Average score
-        self.cursor.execute("SELECT AVG(score) as avg_score FROM candidate_details WHERE score IS NOT NULL")
-        avg_score = self.cursor.fetchone()['avg_score']
-        stats['average_score'] = avg_score if avg_score else 0
-        
-        # Candidates with certifications
+        """Get database statistics from the trigger-maintained aggregates (migration 0007)"""
         self.cursor.execute("""
-            SELECT COUNT(*) as count FROM candidate_details
-            WHERE certifications IS NOT NULL AND certifications != ''
+            SELECT s.total_candidates, s.scored_count, s.score_sum, s.with_certifications,
+                   ARRAY(SELECT location FROM location_counts ORDER BY count DESC, location LIMIT 5) AS top_locations,
+                   ARRAY(SELECT workplace FROM workplace_counts ORDER BY count DESC, workplace LIMIT 5) AS top_workplaces
+            FROM candidate_stats s
+            WHERE s.id = 1
         """)
-        stats['with_certifications'] = self.cursor.fetchone()['count']
+        row = self.cursor.fetchone()
         
-        # Top locations
+        return {
+            'total_candidates': row['total_candidates'],
+            'average_score': row['score_sum'] / row['scored_count'] if row['scored_count'] else 0,
+            'with_certifications': row['with_certifications'],
+            'top_locations': row['top_locations'],
+            'top_workplaces': row['top_workplaces'],
+        }
+
+    def enqueue_job(self, kind, payload):
+        """Queue a job for the workers and return its id"""
+        job_id = uuid.uuid4()
+        self.cursor.execute(
+            "INSERT INTO jobs (id, kind, payload) VALUES (%s, %s, %s)",
+            (job_id, kind, Json(payload))
+        )
+        self.conn.commit()
+        return job_id
+
+    def claim_job(self, worker, kinds):
+        """Claim the oldest queued job of one of ``kinds``, or return None.
+
+        SKIP LOCKED lets any number of workers poll concurrently without
+        blocking on, or double-claiming, the same row.
+        """
         self.cursor.execute("""
-            SELECT location, COUNT(*) as count FROM candidates
-            GROUP BY location
-            ORDER BY count DESC
-            LIMIT 5
-        """)
-        top_locations = self.cursor.fetchall()
-        stats['top_locations'] = [loc['location'] for loc in top_locations]
-        
-        # Top workplaces
+            UPDATE jobs
+            SET status = 'running', worker = %s, attempts = attempts + 1,
+                started_at = CURRENT_TIMESTAMP, heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE status = 'queued' AND kind = ANY(%s)
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING *
+        """, (worker, list(kinds)))
+        job = self.cursor.fetchone()
+        self.conn.commit()
+        return job
+
+    def heartbeat_jobs(self, job_ids):
+        """Mark running jobs as still alive"""
+        if not job_ids:
+            return
+        self.cursor.execute(
+            "UPDATE jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE id = ANY(%s) AND status = 'running'",
+            (list(job_ids),)
+        )
+        self.conn.commit()
+
+    def finish_job(self, job_id, status, result, trace=None, profile=None):
+        """Record the final status and result of a job, with its trace and profile"""
         self.cursor.execute("""
-            SELECT workplace, COUNT(*) as count FROM candidate_details
-            WHERE workplace IS NOT NULL AND workplace != ''
-            GROUP BY workplace
-            ORDER BY count DESC
-            LIMIT 5
-        """)
-        top_workplaces = self.cursor.fetchall()
-        stats['top_workplaces'] = [wp['workplace'] for wp in top_workplaces]
-        
-        return stats
+            UPDATE jobs SET status = %s, result = %s, trace = %s, profile = %s, finished_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+        """, (status, Json(result), Json(trace) if trace is not None else None, profile, job_id))
+        self.conn.commit()
+
+    def requeue_stale_jobs(self, stale_after, max_attempts):
+        """Requeue running jobs whose worker stopped heartbeating.
+
+        Jobs that already used ``max_attempts`` are failed instead. Returns
+        the number of jobs touched.
+        """
+        self.cursor.execute("""
+            UPDATE jobs
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+                finished_at = CASE WHEN attempts >= %s THEN CURRENT_TIMESTAMP END,
+                result = CASE WHEN attempts >= %s
+                    THEN jsonb_build_object('error', 'Worker stopped responding') END,
+                worker = NULL
+            WHERE status = 'running' AND heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+        """, (max_attempts, max_attempts, max_attempts, stale_after))
+        count = self.cursor.rowcount
+        self.conn.commit()
+        return count
+
+    def get_job(self, job_id):
+        """Get a job by id, without its trace and profile"""
+        self.cursor.execute("""
+            SELECT id, kind, status, payload, result, attempts, worker,
+                   created_at, started_at, finished_at, heartbeat_at
+            FROM jobs WHERE id = %s
+        """, (job_id,))
+        return self.cursor.fetchone()
+
+    def get_job_trace(self, job_id):
+        """Get a job's status and span tree"""
+        self.cursor.execute("SELECT id, status, trace FROM jobs WHERE id = %s", (job_id,))
+        return self.cursor.fetchone()
+
+    def get_job_profile(self, job_id):
+        """Get a job's status and folded-stack profile"""
+        self.cursor.execute("SELECT id, status, profile FROM jobs WHERE id = %s", (job_id,))
+        return self.cursor.fetchone()
+
+    def add_job_event(self, job_id, stage, data):
+        """Record a progress event for a job"""
+        self.cursor.execute(
+            "INSERT INTO job_events (job_id, stage, data) VALUES (%s, %s, %s)",
+            (job_id, stage, Json(data))
+        )
+        self.conn.commit()
+
+    def get_job_events(self, job_id, after_id=0, limit=500):
+        """Get a job's progress events with ids above ``after_id``, oldest first"""
+        self.cursor.execute("""
+            SELECT id, stage, data, created_at FROM job_events
+            WHERE job_id = %s AND id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (job_id, after_id, limit))
+        return self.cursor.fetchall()
 
     def close(self):
-        """Close database connection"""
+        """Return the connection to the pool"""
+        if self.conn is None:
+            return
         self.cursor.close()
-        self.conn.close()
\ No newline at end of file
+        self.pool.putconn(self.conn)
+        self.conn = None
+
+
+# Every public query method is timed, labelled with its name, and recorded as a span in job traces
+metrics.instrument_methods(Database, metrics.DB_QUERY_SECONDS, metrics.DB_QUERY_ERRORS, exclude=("close",))
+trace_methods(Database, "db_query", "query", exclude=("close",))
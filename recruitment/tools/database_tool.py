@@ -1,15 +1,110 @@
+import csv
+import io
+import json
+import os
+import time
+from collections import Counter
+
 from crewai.tools import BaseTool
+from . import metrics
 from .database import Database
+from .progress import emit
+from .tokens import count_tokens
+from .tracing import span
+
+MAX_BATCH_SIZE = 1000
+
+# Candidate fields in verbose order with their labels
+FIELD_LABELS = {
+    "id": "Candidate ID",
+    "name": "Name",
+    "position": "Position",
+    "location": "Location",
+    "score": "Score",
+    "experience": "Experience",
+    "certifications": "Certifications",
+    "skills": "Skills",
+    "workplace": "Workplace",
+    "profile_link": "Profile Link",
+}
+
+COMPACT_FIELDS = ["id", "name", "score", "location", "experience", "certifications", "skills", "workplace"]
+COMPACT_MAX_CHARS = 80
+OUTPUT_FORMATS = ("verbose", "compact", "summary")
+NOT_SPECIFIED = "Not specified"
+
+# Command names used as metric labels; anything else is counted as "unknown"
+COMMANDS = (
+    "get_candidates", "get_top_candidates", "get_candidate_by_id", "get_candidates_by_ids",
+    "get_pending_analysis", "get_statistics", "update_score", "update_scores", "add_outreach",
+    "add_outreach_batch",
+)
+ERROR_PREFIXES = ("Invalid command:", "Database error:", "Unknown command")
+
+
+class CommandError(ValueError):
+    """Raised for a malformed command argument or option"""
+
+
 class DatabaseTool(BaseTool):
     name: str = "Database Management Tool"
     description: str = (
-        "Tool for accessing and updating the pharmacy technician candidate database"
+        "Tool for accessing and updating the pharmacy technician candidate database. "
+        "Read commands accept format=compact (one |-separated row per candidate), format=summary "
+        "(aggregates only) or format=verbose, fields=id,name,score,... and max_chars=N. "
+        "get_pending_analysis limit=N lists candidates that are new or changed since they were last scored. "
+        "Batch commands take a JSON list and run in one transaction: "
+        'get_candidates_by_ids [1, 2, 3]; '
+        'update_scores [{"id": 1, "score": 8.5}, {"id": 2, "score": 6}]; '
+        'add_outreach_batch [{"id": 1, "template": "...", "strategy": "..."}]'
     )
 
     def _run(self, command: str) -> str:
+        name = command.split(" ", 1)[0]
+        label = name if name in COMMANDS else "unknown"
+        start = time.perf_counter()
+        with span("tool_call", tool="database", command=label) as current:
+            result = self._execute(command)
+            if current is not None and result.startswith(ERROR_PREFIXES):
+                current.error = result
+        if metrics.enabled():
+            metrics.DATABASE_TOOL_SECONDS.labels(label).observe(time.perf_counter() - start)
+            if result.startswith(ERROR_PREFIXES):
+                metrics.DATABASE_TOOL_ERRORS.labels(label).inc()
+        emit("tool_output", tool="database", command=name,
+             format=self._parse_options(command).get("format", self._default_format()),
+             chars=len(result), tokens=count_tokens(result))
+        return result
+
+    def _execute(self, command):
         db = Database()
         try:
-            if command.startswith("get_candidates"):
+            if command.startswith("get_candidates_by_ids"):
+                # Example: get_candidates_by_ids [1, 2, 3]
+                items = self._parse_batch(command, "get_candidates_by_ids")
+                ids, errors = [], []
+                for i, item in enumerate(items, 1):
+                    candidate_id = self._validate_id(item)
+                    if candidate_id is None:
+                        errors.append(f"item {i}: id must be a positive integer, got {item!r}")
+                    else:
+                        ids.append(candidate_id)
+                candidates = db.get_candidates_by_ids(ids) if ids else []
+                found = {c['id'] for c in candidates}
+                errors.extend(f"id={candidate_id}: candidate not found" for candidate_id in ids if candidate_id not in found)
+                return self._with_errors(self._render(candidates, self._parse_options(command)), errors)
+
+            elif command.startswith("get_pending_analysis"):
+                # Candidates new or changed since their last analysis
+                limit = 100
+                if "limit=" in command:
+                    limit = int(command.split("limit=")[1].split()[0])
+                candidates = db.get_pending_analysis(limit)
+                if not candidates:
+                    return "No candidates pending analysis; every candidate is up to date."
+                return self._render(candidates, self._parse_options(command))
+
+            elif command.startswith("get_candidates"):
                 limit = 100
                 offset = 0
                 if "limit=" in command:
@@ -17,30 +112,68 @@ class DatabaseTool(BaseTool):
                 if "offset=" in command:
                     offset = int(command.split("offset=")[1].split()[0])
                 candidates = db.get_candidates(limit, offset)
-                return self._format_candidates(candidates)
+                return self._render(candidates, self._parse_options(command))
             
             elif command.startswith("get_top_candidates"):
                 limit = 10
                 if "limit=" in command:
                     limit = int(command.split("limit=")[1].split()[0])
                 candidates = db.get_top_candidates(limit)
-                return self._format_candidates(candidates)
+                return self._render(candidates, self._parse_options(command))
             
             elif command.startswith("get_candidate_by_id"):
                 candidate_id = int(command.split("id=")[1].split()[0])
                 candidate = db.get_candidate_by_id(candidate_id)
-                return self._format_candidates([candidate]) if candidate else "Candidate not found"
+                return self._render([candidate], self._parse_options(command)) if candidate else "Candidate not found"
             
             elif command.startswith("get_statistics"):
                 stats = db.get_statistics()
                 return self._format_statistics(stats)
             
+            elif command.startswith("update_scores"):
+                # Example: update_scores [{"id": 5, "score": 8.5}, {"id": 6, "score": 4}]
+                valid, errors = {}, []
+                for i, item in enumerate(self._parse_batch(command, "update_scores"), 1):
+                    candidate_id = self._validate_id(item.get("id") if isinstance(item, dict) else None)
+                    score = item.get("score") if isinstance(item, dict) else None
+                    if candidate_id is None:
+                        errors.append(f"item {i}: id must be a positive integer")
+                    elif isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 10:
+                        errors.append(f"item {i} (id={candidate_id}): score must be a number between 0 and 10")
+                    else:
+                        valid[candidate_id] = float(score)
+                updated = db.update_scores((cid, score, "llm") for cid, score in valid.items())
+                errors.extend(f"id={cid}: candidate not found" for cid in valid if cid not in updated)
+                return self._with_errors(f"Scores updated for {len(updated)} candidates", errors)
+
+            elif command.startswith("add_outreach_batch"):
+                # Example: add_outreach_batch [{"id": 5, "template": "...", "strategy": "..."}]
+                valid, errors = [], []
+                for i, item in enumerate(self._parse_batch(command, "add_outreach_batch"), 1):
+                    candidate_id = self._validate_id(item.get("id") if isinstance(item, dict) else None)
+                    if candidate_id is None:
+                        errors.append(f"item {i}: id must be a positive integer")
+                        continue
+                    template = item.get("template")
+                    strategy = item.get("strategy") or "Standard outreach"
+                    if not isinstance(template, str) or not template.strip():
+                        errors.append(f"item {i} (id={candidate_id}): template must be a non-empty string")
+                    elif not isinstance(strategy, str):
+                        errors.append(f"item {i} (id={candidate_id}): strategy must be a string")
+                    else:
+                        valid.append((candidate_id, template.strip(), strategy.strip()))
+                inserted = db.insert_outreach_strategies(valid)
+                errors.extend(f"id={cid}: candidate not found" for cid, _, _ in valid if cid not in inserted)
+                added = sum(1 for cid, _, _ in valid if cid in inserted)
+                return self._with_errors(f"Outreach strategies added for {added} candidates", errors)
+
             elif command.startswith("update_score"):
                 # Example: update_score id=5 score=8.5
                 parts = command.split()
                 candidate_id = int([p for p in parts if p.startswith("id=")][0].split("=")[1])
                 score = float([p for p in parts if p.startswith("score=")][0].split("=")[1])
-                db.update_candidate_score(candidate_id, score)
+                if not db.update_candidate_score(candidate_id, score):
+                    return "Candidate not found"
                 return f"Score updated for candidate {candidate_id} to {score}"
             
             elif command.startswith("add_outreach"):
@@ -60,32 +193,153 @@ class DatabaseTool(BaseTool):
                 return f"Outreach strategy added for candidate {candidate_id}"
             
             else:
-                return "Unknown command. Available commands: get_candidates, get_top_candidates, get_candidate_by_id, get_statistics, update_score, add_outreach"
+                return (
+                    "Unknown command. Available commands: get_candidates, get_top_candidates, get_candidate_by_id, "
+                    "get_candidates_by_ids, get_pending_analysis, get_statistics, update_score, update_scores, "
+                    "add_outreach, add_outreach_batch"
+                )
         
+        except CommandError as e:
+            return f"Invalid command: {str(e)}"
         except Exception as e:
             return f"Database error: {str(e)}"
         finally:
             db.close()
             
-    def _format_candidates(self, candidates):
+    def _parse_batch(self, command, name):
+        """Parse the JSON list following a batch command name and its options"""
+        payload = command[len(name):]
+        start = payload.find("[")
+        try:
+            if start < 0:
+                raise ValueError("no list found")
+            items = json.loads(payload[start:])
+        except ValueError as e:
+            raise CommandError(f"{name} expects a JSON list, e.g. {name} [...] ({e})")
+        if not isinstance(items, list):
+            raise CommandError(f"{name} expects a JSON list, got {type(items).__name__}")
+        if len(items) > MAX_BATCH_SIZE:
+            raise CommandError(f"at most {MAX_BATCH_SIZE} items per call, got {len(items)}")
+        return items
+
+    def _parse_options(self, command):
+        """Output options (format=, fields=, max_chars=) given before any JSON payload"""
+        options = {}
+        for part in command.split("[", 1)[0].split():
+            key, _, value = part.partition("=")
+            if key in ("format", "fields", "max_chars"):
+                options[key] = value
+        return options
+
+    @staticmethod
+    def _default_format():
+        return os.environ.get("DATABASE_TOOL_FORMAT", "verbose")
+
+    def _render(self, candidates, options):
+        """Format candidate rows as selected by the command's output options"""
+        output_format = options.get("format", self._default_format())
+        if output_format not in OUTPUT_FORMATS:
+            raise CommandError(f"format must be one of {', '.join(OUTPUT_FORMATS)}")
+        if output_format == "summary":
+            return self._format_summary(candidates)
+
+        fields = None
+        if options.get("fields"):
+            fields = [f.strip() for f in options["fields"].split(",") if f.strip()]
+            unknown = [f for f in fields if f not in FIELD_LABELS]
+            if unknown:
+                raise CommandError(f"unknown fields {', '.join(unknown)}; available: {', '.join(FIELD_LABELS)}")
+
+        max_chars = options.get("max_chars")
+        if max_chars is not None:
+            if not max_chars.isdigit() or int(max_chars) < 1:
+                raise CommandError("max_chars must be a positive integer")
+            max_chars = int(max_chars)
+
+        if output_format == "compact":
+            return self._format_compact(
+                candidates, fields or COMPACT_FIELDS, COMPACT_MAX_CHARS if max_chars is None else max_chars
+            )
+        return self._format_candidates(candidates, fields, max_chars)
+
+    @staticmethod
+    def _validate_id(value):
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            return None
+        return value
+
+    @staticmethod
+    def _with_errors(result, errors):
+        if not errors:
+            return result
+        return "\n".join([result, f"{len(errors)} items failed:", *(f"- {error}" for error in errors)])
+
+    def _format_candidates(self, candidates, fields=None, max_chars=None):
         if not candidates:
             return "No candidates found."
             
         result = []
         for c in candidates:
-            result.append("\n".join([
-                f"Candidate ID: {c['id']}",
-                f"Name: {c['name']}",
-                f"Position: {c['position']}",
-                f"Location: {c['location']}",
-                f"Score: {c.get('score', 'Not scored')}",
-                f"Experience: {c.get('experience', 'Not specified')}",
-                f"Certifications: {c.get('certifications', 'Not specified')}",
-                f"Skills: {c.get('skills', 'Not specified')}",
-                f"Workplace: {c.get('workplace', 'Not specified')}",
-                f"Profile Link: {c['profile_link']}"
-            ]))
+            result.append("\n".join(
+                f"{FIELD_LABELS[field]}: {self._truncate(str(c.get(field, 'Not scored' if field == 'score' else NOT_SPECIFIED)), max_chars)}"
+                for field in (fields or FIELD_LABELS)
+            ))
         return "\n\n".join(result)
+
+    def _format_compact(self, candidates, fields, max_chars):
+        """One header line, then one |-separated line per candidate; empty means not specified"""
+        if not candidates:
+            return "No candidates found."
+        out = io.StringIO()
+        writer = csv.writer(out, delimiter="|", lineterminator="\n")
+        writer.writerow(fields)
+        for c in candidates:
+            writer.writerow([self._compact_value(c.get(field), max_chars) for field in fields])
+        return out.getvalue().rstrip("\n")
+
+    def _compact_value(self, value, max_chars):
+        if value is None:
+            return ""
+        text = " ".join(str(value).split())
+        if text == NOT_SPECIFIED:
+            return ""
+        if text.endswith(" years of experience"):
+            text = text[:-len(" of experience")]
+        return self._truncate(text, max_chars)
+
+    @staticmethod
+    def _truncate(text, max_chars):
+        if max_chars is None or len(text) <= max_chars:
+            return text
+        return text[:max(max_chars - 1, 0)] + "…"
+
+    def _format_summary(self, candidates):
+        """Aggregates over the selected candidates instead of the rows themselves"""
+        if not candidates:
+            return "No candidates found."
+        scores = [float(c['score']) for c in candidates if c.get('score')]
+        lines = [f"Candidates: {len(candidates)} (scored: {len(scores)})"]
+        if scores:
+            lines.append(
+                f"Score min/avg/max: {min(scores):.1f}/{sum(scores) / len(scores):.2f}/{max(scores):.1f}; "
+                f">=8: {sum(s >= 8 for s in scores)}, 6-7.9: {sum(6 <= s < 8 for s in scores)}, "
+                f"<6: {sum(s < 6 for s in scores)}"
+            )
+        lines.append(f"With stated experience: {sum(1 for c in candidates if (c.get('experience') or NOT_SPECIFIED) != NOT_SPECIFIED)}")
+        for label, field in [("Certifications", "certifications"), ("Workplaces", "workplace"), ("Skills", "skills")]:
+            counts = Counter(
+                value for c in candidates
+                for value in (c.get(field) or "").split(", ") if value and value != NOT_SPECIFIED
+            )
+            lines.append(f"{label}: {self._format_counts(counts)}")
+        lines.append(f"Locations: {self._format_counts(Counter(c['location'] for c in candidates if c.get('location')))}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_counts(counts, top=5):
+        return ", ".join(f"{value} ({count})" for value, count in counts.most_common(top)) or "none"
     
     def _format_statistics(self, stats):
         return "\n".join([
@@ -95,4 +349,5 @@ class DatabaseTool(BaseTool):
             f"Candidates with Certifications: {stats['with_certifications']}",
             f"Top Locations: {', '.join(stats['top_locations'])}",
             f"Top Workplaces: {', '.join(stats['top_workplaces'])}"
-        ])
\ No newline at end of file
+        ])
+
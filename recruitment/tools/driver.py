@@ -1,21 +1,137 @@
+import os
+import threading
 import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from urllib3.exceptions import HTTPError
+
+from . import metrics
+from .tracing import span
+
+POLL_INTERVAL = 0.1
+# Errors that mean the browser session itself is unusable; a dead geckodriver
+# surfaces as urllib3 or socket errors rather than WebDriverException
+BROWSER_ERRORS = (WebDriverException, HTTPError, ConnectionError)
+
+
+class WaitRecorder:
+    """Keeps recent wait durations per operation to show page readiness latency"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._counts = defaultdict(int)
+        self._timeouts = defaultdict(int)
+
+    def record(self, operation, seconds, timed_out=False):
+        with self._lock:
+            self._samples[operation].append(seconds)
+            self._counts[operation] += 1
+            if timed_out:
+                self._timeouts[operation] += 1
+
+    def stats(self):
+        """Percentiles (ms) over the recent window, plus totals, per operation"""
+        with self._lock:
+            snapshot = {op: sorted(samples) for op, samples in self._samples.items()}
+            counts, timeouts = dict(self._counts), dict(self._timeouts)
+        stats = {}
+        for op, samples in snapshot.items():
+            def pct(p):
+                return samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000
+            stats[op] = {
+                "count": counts[op],
+                "timeouts": timeouts.get(op, 0),
+                "p50_ms": pct(50),
+                "p90_ms": pct(90),
+                "p99_ms": pct(99),
+                "max_ms": samples[-1] * 1000,
+            }
+        return stats
+
+
+wait_times = WaitRecorder()
+
+
+class _Stable:
+    """Wait condition that holds once ``probe`` returns the same value for ``quiet`` seconds"""
+
+    def __init__(self, probe, quiet):
+        self.probe = probe
+        self.quiet = quiet
+        self.value = object()
+        self.since = None
+
+    def __call__(self, driver):
+        value = self.probe(driver)
+        now = time.monotonic()
+        if value != self.value:
+            self.value, self.since = value, now
+            return False
+        return now - self.since >= self.quiet
+
 
 class Driver:
-    def __init__(self, url, cookie=None):
-        self.driver = self._create_driver(url, cookie)
+    def __init__(self, url, cookie=None, headless=None):
+        if headless is None:
+            headless = os.environ.get("LINKEDIN_HEADLESS", "true").lower() not in ("0", "false", "no")
+        self.navigations = 0
+        self.page_timeout = float(os.environ.get("LINKEDIN_PAGE_TIMEOUT", "15"))
+        self.quiet_period = float(os.environ.get("LINKEDIN_QUIET_PERIOD", "0.5"))
+        self.driver = self._create_driver(url, cookie, headless)
+
+    def navigate(self, url, wait_for=None, timeout=None):
+        """Load ``url`` and wait until it is ready, at most ``timeout`` seconds in total.
+
+        Readiness means the document has loaded and then either ``wait_for``
+        matches elements whose count has stopped changing, or, without a
+        selector, no new network requests have started for a quiet period.
+        Returns False if the page was not ready in time.
+        """
+        with span("navigate", url=url) as current:
+            ready = self._navigate(url, wait_for, timeout)
+            if current is not None:
+                current.attributes["ready"] = ready
+        return ready
 
-    def navigate(self, url, wait=3):
+    def _navigate(self, url, wait_for, timeout):
+        deadline = time.monotonic() + (self.page_timeout if timeout is None else timeout)
+        self.navigations += 1
+        start = time.monotonic()
         self.driver.get(url)
-        time.sleep(wait)
 
-    def scroll_to_bottom(self, wait=3):
-        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(wait)
-        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(wait)
+        ready = self._wait("ready_state", self._document_complete, deadline)
+        if wait_for:
+            ready = ready and self._wait(
+                "selector", lambda d: d.find_elements(By.CSS_SELECTOR, wait_for), deadline
+            )
+            ready = ready and self._wait(
+                "result_count", _Stable(lambda d: len(d.find_elements(By.CSS_SELECTOR, wait_for)), self.quiet_period), deadline
+            )
+        else:
+            ready = ready and self._wait("network_idle", _Stable(self._resource_count, self.quiet_period), deadline)
+
+        elapsed = time.monotonic() - start
+        wait_times.record("navigate", elapsed, timed_out=not ready)
+        if metrics.enabled():
+            metrics.BROWSER_NAVIGATE_SECONDS.labels("ready" if ready else "timeout").observe(elapsed)
+        return ready
+
+    def scroll_to_bottom(self, timeout=None):
+        """Scroll down twice, each time waiting for lazily loaded content to settle"""
+        deadline = time.monotonic() + (self.page_timeout if timeout is None else timeout)
+        ready = True
+        for _ in range(2):
+            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            height = _Stable(lambda d: d.execute_script("return document.body.scrollHeight;"), self.quiet_period)
+            ready = self._wait("scroll", height, deadline) and ready
+        return ready
 
     def get_element(self, selector):
         return self.driver.find_element(By.CSS_SELECTOR, selector)
@@ -23,6 +139,9 @@ class Driver:
     def get_elements(self, selector):
         return self.driver.find_elements(By.CSS_SELECTOR, selector)
 
+    def execute_script(self, script, *args):
+        return self.driver.execute_script(script, *args)
+
     def fill_text_field(self, selector, text):
         element = self.get_element(selector)
         element.clear()
@@ -32,14 +151,223 @@ class Driver:
         element = self.get_element(selector)
         element.click()
 
-    def _create_driver(self, url, cookie):
+    def _wait(self, operation, condition, deadline):
+        start = time.monotonic()
+        remaining = deadline - start
+        try:
+            if remaining <= 0:
+                raise TimeoutException()
+            with span("wait", operation=operation):
+                WebDriverWait(self.driver, remaining, poll_frequency=POLL_INTERVAL).until(condition)
+            timed_out = False
+        except TimeoutException:
+            timed_out = True
+        elapsed = time.monotonic() - start
+        wait_times.record(operation, elapsed, timed_out=timed_out)
+        if metrics.enabled():
+            metrics.BROWSER_WAIT_SECONDS.labels(operation, "timeout" if timed_out else "ready").observe(elapsed)
+        return not timed_out
+
+    @staticmethod
+    def _document_complete(driver):
+        return driver.execute_script("return document.readyState;") == "complete"
+
+    @staticmethod
+    def _resource_count(driver):
+        return driver.execute_script("return performance.getEntriesByType('resource').length;")
+
+    def is_alive(self):
+        """Check that the browser still answers WebDriver commands"""
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _create_driver(self, url, cookie, headless):
         options = Options()
-        # options.add_argument("--headless")
+        if headless:
+            options.add_argument("--headless")
         driver = webdriver.Firefox(options=options)
-        driver.get(url)
-        if cookie:
-            driver.add_cookie(cookie)
+        try:
+            driver.get(url)
+            if cookie:
+                driver.add_cookie(cookie)
+        except Exception:
+            driver.quit()
+            raise
         return driver
 
     def close(self):
-        self.driver.close()
\ No newline at end of file
+        """Shut the browser down"""
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class DriverPool:
+    """Pool of warm, already-authenticated browser sessions.
+
+    Sessions are created on demand up to ``size`` and reused across searches.
+    A session is recycled (closed and replaced on the next checkout) after
+    ``max_navigations`` page loads, when its user hits a browser error, or when
+    it no longer responds at checkout. Every session that is dropped gives
+    its slot back, so crashed browsers never shrink the pool.
+    """
+
+    def __init__(self, url, cookie=None, size=2, max_navigations=100, timeout=300.0, headless=None):
+        if size < 1:
+            raise ValueError(f"Invalid driver pool size: {size}")
+        self.url = url
+        self.cookie = cookie
+        self.size = size
+        self.max_navigations = max_navigations
+        self.timeout = timeout
+        self.headless = headless
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._started = 0
+        self._recycled = 0
+        self._crashed = 0
+
+    def checkout(self, timeout=None):
+        """Take a session out of the pool, starting a browser if below ``size``"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            driver = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Driver pool is closed")
+                    if self._idle:
+                        driver = self._idle.pop()
+                        break
+                    if self._created < self.size:
+                        self._created += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No browser session available after {timeout:.0f}s (size={self.size})")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if driver is None:
+                try:
+                    driver = Driver(self.url, self.cookie, headless=self.headless)
+                except Exception:
+                    with self._cond:
+                        self._created -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._started += 1
+                if metrics.enabled():
+                    metrics.BROWSER_SESSIONS.labels("started").inc()
+            else:
+                try:
+                    alive = driver.is_alive()
+                except BaseException:
+                    self._retire(driver, crashed=True)
+                    raise
+                if not alive:
+                    self._retire(driver, crashed=True)
+                    continue
+            break
+
+        wait = time.monotonic() - start
+        with self._cond:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        if metrics.enabled():
+            metrics.BROWSER_CHECKOUT_WAIT_SECONDS.labels().observe(wait)
+        return driver
+
+    def checkin(self, driver, broken=False):
+        """Return a session, recycling it if it crashed or is worn out"""
+        with self._cond:
+            self._in_use -= 1
+        if broken or self._closed or driver.navigations >= self.max_navigations:
+            self._retire(driver, crashed=broken)
+            return
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """Check a session out for the duration of a ``with`` block.
+
+        The session is recycled if the block raises one of ``BROWSER_ERRORS``;
+        any other error leaves the browser healthy and it goes back to the pool.
+        """
+        driver = self.checkout(timeout)
+        broken = False
+        try:
+            yield driver
+        except BROWSER_ERRORS:
+            broken = True
+            raise
+        finally:
+            self.checkin(driver, broken=broken)
+
+    def close(self):
+        """Shut down idle sessions; sessions in use are closed when returned"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            self._retire(driver)
+
+    def stats(self):
+        """Pool occupancy, browser churn and checkout wait times"""
+        with self._cond:
+            return {
+                "size": self.size,
+                "sessions": self._created,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "avg_wait_ms": (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+                "started": self._started,
+                "recycled": self._recycled,
+                "crashed": self._crashed,
+            }
+
+    def _retire(self, driver, crashed=False):
+        try:
+            driver.close()
+        finally:
+            self._release(crashed)
+
+    def _release(self, crashed):
+        with self._cond:
+            self._created -= 1
+            self._recycled += 1
+            if crashed:
+                self._crashed += 1
+            self._cond.notify()
+        if metrics.enabled():
+            metrics.BROWSER_SESSIONS.labels("recycled").inc()
+            if crashed:
+                metrics.BROWSER_SESSIONS.labels("crashed").inc()
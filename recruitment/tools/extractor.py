@@ -0,0 +1,150 @@
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+CERTIFICATION_KEYWORDS = {
+    "CPhT": "Certified Pharmacy Technician (CPhT)",
+    "PTCB": "Pharmacy Technician Certification Board (PTCB) certified",
+    "ExCPT": "Exam for the Certification of Pharmacy Technicians (ExCPT)",
+    "NHA": "National Healthcareer Association certified",
+    "certified": "Certified Pharmacy Technician"
+}
+
+SKILL_KEYWORDS = {
+    "retail": "retail pharmacy",
+    "hospital": "hospital pharmacy",
+    "compounding": "medication compounding",
+    "inventory": "inventory management",
+    "billing": "insurance billing",
+    "sterile": "sterile compounding",
+    "IV": "IV preparation",
+    "customer service": "customer service",
+    "EMR": "electronic medical records"
+}
+
+DEFAULT_SKILLS = ["medication dispensing", "pharmacy operations", "prescription processing"]
+
+WORKPLACE_KEYWORDS = {
+    "hospital": "Hospital",
+    "retail": "Retail Pharmacy",
+    "clinic": "Clinical Setting",
+    "pharmacy": "Pharmacy",
+    "drugstore": "Drugstore",
+    "CVS": "CVS Pharmacy",
+    "Walgreens": "Walgreens",
+    "Rite Aid": "Rite Aid",
+    "Walmart": "Walmart Pharmacy",
+    "long-term care": "Long-term Care Facility",
+    "LTC": "Long-term Care Facility"
+}
+
+NOT_SPECIFIED = "Not specified"
+
+CACHE_SIZE = 65536
+
+
+class ProfileAttributes(NamedTuple):
+    """Pharmacy attributes extracted from a profile headline.
+
+    The text fields are what gets stored in ``candidate_details``; the
+    ``*_keywords`` tuples hold the matched keywords (lowercased) in table
+    order for code that needs the raw hits.
+    """
+    experience: str
+    certifications: str
+    skills: str
+    workplace: str
+    years: Optional[int]
+    certification_keywords: Tuple[str, ...]
+    skill_keywords: Tuple[str, ...]
+    workplace_keywords: Tuple[str, ...]
+
+
+def _compile(*tables):
+    keywords = sorted({keyword.lower() for table in tables for keyword in table}, key=len, reverse=True)
+    for keyword in keywords:
+        for other in keywords:
+            if keyword != other and other.startswith(keyword):
+                # A prefix would shadow the longer keyword at the same position
+                raise ValueError(f"Keyword {keyword!r} is a prefix of {other!r}")
+    alternatives = "|".join(re.escape(keyword) for keyword in keywords)
+    return re.compile(rf"(?P<years>\d+)\s*(?:year|yr)|(?P<keyword>{alternatives})")
+
+
+# All keyword tables plus the "N years" pattern, matched in a single scan
+_PATTERN = _compile(CERTIFICATION_KEYWORDS, SKILL_KEYWORDS, WORKPLACE_KEYWORDS)
+
+_CERTIFICATIONS = [(k.lower(), v) for k, v in CERTIFICATION_KEYWORDS.items()]
+_SKILLS = [(k.lower(), v) for k, v in SKILL_KEYWORDS.items()]
+_WORKPLACES = [(k.lower(), v) for k, v in WORKPLACE_KEYWORDS.items()]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def extract(text):
+    """Extract experience, certifications, skills and workplace from one text.
+
+    Results are memoized by text, so repeated headlines are only scanned once.
+    """
+    years = None
+    hits = set()
+    for match in _PATTERN.finditer((text or "").lower()):
+        if match.lastgroup == "keyword":
+            hits.add(match.group("keyword"))
+        elif years is None:
+            years = int(match.group("years"))
+
+    certification_hits = [(k, v) for k, v in _CERTIFICATIONS if k in hits]
+    skill_hits = [(k, v) for k, v in _SKILLS if k in hits]
+    workplace_hits = [(k, v) for k, v in _WORKPLACES if k in hits]
+
+    return ProfileAttributes(
+        experience=f"{years} years of experience" if years is not None else NOT_SPECIFIED,
+        certifications=", ".join(v for _, v in certification_hits) or NOT_SPECIFIED,
+        skills=", ".join(v for _, v in skill_hits) or ", ".join(DEFAULT_SKILLS),
+        workplace=", ".join(v for _, v in workplace_hits) or NOT_SPECIFIED,
+        years=years,
+        certification_keywords=tuple(k for k, _ in certification_hits),
+        skill_keywords=tuple(k for k, _ in skill_hits),
+        workplace_keywords=tuple(k for k, _ in workplace_hits),
+    )
+
+
+def _tag_map(table):
+    # Keywords sharing a label (e.g. "long-term care" and "LTC") share the first one as their tag
+    first = {}
+    for keyword, label in table.items():
+        first.setdefault(label, keyword.lower())
+    return {keyword.lower(): first[label] for keyword, label in table.items()}
+
+
+_CERTIFICATION_TAGS = _tag_map(CERTIFICATION_KEYWORDS)
+_SKILL_TAGS = _tag_map(SKILL_KEYWORDS)
+_WORKPLACE_TAGS = _tag_map(WORKPLACE_KEYWORDS)
+
+
+class ProfileTags(NamedTuple):
+    """Normalized facet values for the indexed tag columns of ``candidate_details``"""
+    certifications: List[str]
+    skills: List[str]
+    workplaces: List[str]
+
+
+def profile_tags(attributes):
+    """Tags for extracted attributes: one lowercased keyword per matched label"""
+    def tags(keywords, mapping):
+        return list(dict.fromkeys(mapping[k] for k in keywords))
+    return ProfileTags(
+        certifications=tags(attributes.certification_keywords, _CERTIFICATION_TAGS),
+        skills=tags(attributes.skill_keywords, _SKILL_TAGS),
+        workplaces=tags(attributes.workplace_keywords, _WORKPLACE_TAGS),
+    )
+
+
+def extract_many(texts) -> List[ProfileAttributes]:
+    """Extract attributes for a batch of texts, in order"""
+    return [extract(text) for text in texts]
+
+
+def extract_profiles(people) -> List[ProfileAttributes]:
+    """Extract attributes from the position headline of each scraped profile"""
+    return extract_many(person.get('position') or "" for person in people)
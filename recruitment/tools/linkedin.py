@@ -1,7 +1,56 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple, Optional
+
 from crewai.tools import BaseTool
-from .client import Client as LinkedinClient
+from . import metrics
+from .client import search_people
 from .database import Database
-import re
+from .extractor import extract_profiles, profile_tags
+from .progress import emit, record_candidates
+from .scoring import location_state, score_profiles, scoring_settings
+from .search_cache import get_search_cache, normalize_criteria
+from .tracing import span
+
+
+class SearchSettings(NamedTuple):
+    max_pages: int
+    page_concurrency: int
+    target_count: Optional[int]
+
+
+def default_search_settings():
+    target_count = os.environ.get("LINKEDIN_TARGET_COUNT")
+    return SearchSettings(
+        max_pages=int(os.environ.get("LINKEDIN_MAX_PAGES", "1")),
+        page_concurrency=int(os.environ.get("LINKEDIN_PAGE_CONCURRENCY", "1")),
+        target_count=int(target_count) if target_count else None,
+    )
+
+
+_search_settings = ContextVar("linkedin_search_settings", default=None)
+
+
+@contextmanager
+def search_settings(**overrides):
+    """Override the paging settings of LinkedIn searches run inside the block.
+
+    Used to apply per-request settings to the searches the crew makes; values
+    left as None fall back to the environment defaults.
+    """
+    settings = default_search_settings()._replace(**{k: v for k, v in overrides.items() if v is not None})
+    token = _search_settings.set(settings)
+    try:
+        yield settings
+    finally:
+        _search_settings.reset(token)
+
+
+def current_search_settings():
+    return _search_settings.get() or default_search_settings()
+
 
 class LinkedInTool(BaseTool):
     name: str = "LinkedIn Pharmacy Technician Search Tool"
@@ -10,8 +59,6 @@ class LinkedInTool(BaseTool):
     )
 
     def _run(self, criteria: str) -> str:
-        linkedin_client = LinkedinClient()
-        
         # Ensure we're searching for Pharmacy Technicians
         if "pharmacy technician" not in criteria.lower():
             criteria = f"pharmacy technician, {criteria}"
@@ -20,150 +67,146 @@ class LinkedInTool(BaseTool):
         if "united states" not in criteria.lower() and "us " not in criteria.lower():
             criteria = f"{criteria}, United States"
         
-        # Search LinkedIn with the combined criteria
+        settings = current_search_settings()
+        
+        # Identical searches share one scrape: concurrent ones wait for it, later ones reuse it until it expires
+        cache_key = (normalize_criteria(criteria), settings.max_pages, settings.target_count)
+        start = time.perf_counter()
         try:
-            people = linkedin_client.find_people(criteria)  
-            
-            if not people:
-                return "No Pharmacy Technician profiles found matching the criteria."
-            
-            # Store data in PostgreSQL
-            db = Database()
-            stored_profiles = []
-            
-            for person in people:
-                # Extract basic info
-                candidate_id = db.insert_candidate(
-                    person['name'],
-                    person['position'],
-                    person['location'],
-                    person['profile_link']
+            with span("tool_call", tool="linkedin", criteria=criteria) as current:
+                (people, attributes, stored_profiles), outcome = get_search_cache().get_or_compute(
+                    cache_key, lambda: self._search_and_store(criteria, settings)
                 )
-                
-                # Extract pharmacy-specific information
-                experience = self._extract_experience(person['position'])
-                certifications = self._extract_certifications(person['position'])
-                skills = self._extract_skills(person['position'])
-                workplace = self._extract_workplace(person['position'])
-                
-                # Store the details
-                db.insert_candidate_details(
-                    candidate_id,
-                    experience,
-                    certifications,
-                    skills,
-                    workplace,
-                    0.0  # Initial score, will be updated by analyzer agent
-                )
-                
-                stored_profiles.append(person['name'])
-            
-            db.close()
-            
-            # Format for crew output
-            formatted_people = self._format_publications_to_text(people)
-            summary = f"Successfully found and stored {len(stored_profiles)} Pharmacy Technician profiles matching the criteria: {criteria}"
-            
-            return f"{summary}\n\n{formatted_people}"
-            
+                if current is not None:
+                    current.attributes["cache"] = outcome
+                # Which candidates still need analysis changes after every analysis, so it is never cached
+                prescores, skipped = self._triage(people, attributes, stored_profiles)
         except Exception as e:
+            if metrics.enabled():
+                metrics.LINKEDIN_SEARCH_ERRORS.labels().inc()
+                metrics.LINKEDIN_SEARCH_SECONDS.labels("error").observe(time.perf_counter() - start)
             return f"Error searching LinkedIn: {str(e)}"
-        finally:
-            linkedin_client.close()
+        if metrics.enabled():
+            metrics.LINKEDIN_SEARCH_SECONDS.labels(outcome).observe(time.perf_counter() - start)
+        emit("search_cache", outcome=outcome)
+        # Unchanged candidates keep their last analysis; new or changed ones without a final rule score go to the analyzer
+        processed = [cid for cid in stored_profiles.values() if cid not in skipped]
+        needs_review = [cid for cid in processed if prescores.get(cid, (None, True))[1]]
+        record_candidates(processed, needs_review, skipped)
+        
+        if not people:
+            return "No Pharmacy Technician profiles found matching the criteria."
+        
+        # Format for crew output
+        formatted_people = self._format_publications_to_text(people, attributes, stored_profiles, prescores, skipped)
+        summary = f"Successfully found and stored {len(stored_profiles)} Pharmacy Technician profiles matching the criteria: {criteria}"
+        if skipped:
+            summary += f"\n{len(skipped)} are unchanged since their last analysis and need no further work"
+        if prescores:
+            summary += (
+                f"\n{len(processed) - len(needs_review)} were scored automatically against the rubric; "
+                f"{len(needs_review)} need review"
+            )
+        
+        return f"{summary}\n\n{formatted_people}"
+
+    def _search_and_store(self, criteria, settings):
+        """Search LinkedIn with the combined criteria, storing each page as it arrives"""
+        emit("search_started", criteria=criteria, **settings._asdict())
+        people, attributes = [], []
+        stored_profiles = {}
+        
+        for page, page_people in search_people(
+            criteria,
+            max_pages=settings.max_pages,
+            concurrency=settings.page_concurrency,
+            target_count=settings.target_count,
+        ):
+            # Extract pharmacy-specific information once for storing and formatting
+            page_attributes = extract_profiles(page_people)
             
+            # Store data in PostgreSQL, one batch per page
+            rows = [{
+                **person,
+                'experience': attrs.experience,
+                'certifications': attrs.certifications,
+                'skills': attrs.skills,
+                'workplace': attrs.workplace,
+                'certification_tags': tags.certifications,
+                'skill_tags': tags.skills,
+                'workplace_tags': tags.workplaces,
+                'location_state': location_state(person.get('location')),
+            } for person, attrs, tags in zip(page_people, page_attributes, map(profile_tags, page_attributes))]
+            with Database() as db:
+                stored_profiles.update(db.upsert_candidates(rows))
+            emit("profiles_stored", page=page, count=len(rows), total=len(stored_profiles))
             
-    def _format_publications_to_text(self, people):
+            people.extend(page_people)
+            attributes.extend(page_attributes)
+        
+        return people, attributes, stored_profiles
+
+    def _triage(self, people, attributes, stored_profiles):
+        """Split the stored candidates into those already analyzed at their current content and the rest.
+
+        The rest are scored against the rubric; borderline ones are left to the
+        analyzer. Returns ``(prescores, skipped)``: candidate id to (score,
+        needs review) for the candidates scored here, and the skipped ids.
+        """
+        if not stored_profiles:
+            return {}, set()
+        scoring = scoring_settings()
+        with Database() as db:
+            pending = db.get_pending_ids(stored_profiles.values())
+            skipped = set(stored_profiles.values()) - pending
+            pending_ids = {link: cid for link, cid in stored_profiles.items() if cid in pending}
+            prescores = {}
+            if scoring.enabled and pending_ids:
+                prescores = self._prescore(people, attributes, pending_ids, scoring)
+                updated = db.update_scores(
+                    (cid, score, "review" if review else "rules") for cid, (score, review) in prescores.items()
+                )
+                # Candidates the analyzer already scored keep their score
+                prescores = {cid: value for cid, value in prescores.items() if cid in updated}
+        emit("profiles_triaged", pending=len(pending), skipped=len(skipped), prescored=len(prescores),
+             needs_review=sum(review for _, review in prescores.values()))
+        return prescores, skipped
+
+    def _prescore(self, people, attributes, candidate_ids, scoring):
+        """Map candidate id to (rubric score, needs review) for one page of profiles"""
+        scored = [(p, a) for p, a in zip(people, attributes) if p.get('profile_link') in candidate_ids]
+        result = score_profiles(
+            [a for _, a in scored], [p.get('location') for p, _ in scored],
+            threshold=scoring.threshold, borderline=scoring.borderline,
+        )
+        return {
+            candidate_ids[p['profile_link']]: (float(score), bool(review))
+            for (p, _), score, review in zip(scored, result.scores, result.needs_review)
+        }
+            
+    def _format_publications_to_text(self, people, attributes, stored_profiles=None, prescores=None, skipped=()):
+        stored_profiles, prescores = stored_profiles or {}, prescores or {}
         result = ["\n".join([
             f"Profile #{i+1}:",
             f"Name: {p['name']}",
             f"Position: {p['position']}",
             f"Location: {p['location']}",
             f"Profile Link: {p['profile_link']}",
-            f"Experience: {self._extract_experience(p['position'])}",
-            f"Certifications: {self._extract_certifications(p['position'])}",
-            f"Likely Skills: {self._extract_skills(p['position'])}",
-            f"Workplace Type: {self._extract_workplace(p['position'])}"
-        ]) for i, p in enumerate(people)]
+            f"Experience: {a.experience}",
+            f"Certifications: {a.certifications}",
+            f"Likely Skills: {a.skills}",
+            f"Workplace Type: {a.workplace}",
+            *self._format_prescore(stored_profiles.get(p['profile_link']), prescores, skipped)
+        ]) for i, (p, a) in enumerate(zip(people, attributes))]
         result = "\n\n".join(result)
 
         return result
-        
-    def _extract_experience(self, position):
-        """Extract potential experience info from position text"""
-        experience = "Not specified"
-        years_keywords = ["year", "yr", "years"]
-        
-        for keyword in years_keywords:
-            if keyword in position.lower():
-                # Extract the experience using regex to find patterns like "5 years"
-                match = re.search(r'(\d+)\s*(?:year|yr|years)', position.lower())
-                if match:
-                    experience = f"{match.group(1)} years of experience"
-                    break
-        
-        return experience
-
-    def _extract_certifications(self, position):
-        """Extract potential certification info from position text"""
-        certifications = []
-        cert_keywords = {
-            "CPhT": "Certified Pharmacy Technician (CPhT)",
-            "PTCB": "Pharmacy Technician Certification Board (PTCB) certified",
-            "ExCPT": "Exam for the Certification of Pharmacy Technicians (ExCPT)",
-            "NHA": "National Healthcareer Association certified",
-            "certified": "Certified Pharmacy Technician"
-        }
-        
-        for keyword, full_cert in cert_keywords.items():
-            if keyword.lower() in position.lower():
-                certifications.append(full_cert)
-        
-        return ", ".join(certifications) if certifications else "Not specified"
-
-    def _extract_skills(self, position):
-        """Extract potential skills from position text"""
-        skills = []
-        skill_keywords = {
-            "retail": "retail pharmacy",
-            "hospital": "hospital pharmacy",
-            "compounding": "medication compounding",
-            "inventory": "inventory management",
-            "billing": "insurance billing",
-            "sterile": "sterile compounding",
-            "IV": "IV preparation",
-            "customer service": "customer service",
-            "EMR": "electronic medical records"
-        }
-        
-        for keyword, skill in skill_keywords.items():
-            if keyword.lower() in position.lower():
-                skills.append(skill)
-        
-        # Add default pharmacy skills
-        if not skills:
-            skills = ["medication dispensing", "pharmacy operations", "prescription processing"]
-        
-        return ", ".join(skills)
-
-    def _extract_workplace(self, position):
-        """Extract potential workplace info from position text"""
-        workplaces = []
-        workplace_keywords = {
-            "hospital": "Hospital",
-            "retail": "Retail Pharmacy",
-            "clinic": "Clinical Setting",
-            "pharmacy": "Pharmacy",
-            "drugstore": "Drugstore",
-            "CVS": "CVS Pharmacy",
-            "Walgreens": "Walgreens",
-            "Rite Aid": "Rite Aid",
-            "Walmart": "Walmart Pharmacy",
-            "long-term care": "Long-term Care Facility",
-            "LTC": "Long-term Care Facility"
-        }
-        
-        for keyword, workplace in workplace_keywords.items():
-            if keyword.lower() in position.lower():
-                workplaces.append(workplace)
-        
-        return ", ".join(workplaces) if workplaces else "Not specified"
\ No newline at end of file
+
+    def _format_prescore(self, candidate_id, prescores, skipped):
+        if candidate_id in skipped:
+            return [f"Candidate ID: {candidate_id}", "Analysis: up to date, unchanged since the last analysis"]
+        if candidate_id not in prescores:
+            return []
+        score, review = prescores[candidate_id]
+        status = "needs review" if review else "final, scored by rules"
+        return [f"Candidate ID: {candidate_id}", f"Pre-score: {score:.1f} ({status})"]
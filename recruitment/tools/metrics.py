@@ -0,0 +1,297 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Each process (API, worker) keeps its own registry; the API serves it at
+``/metrics`` and workers on ``WORKER_METRICS_PORT``. With
+``METRICS_ENABLED=false`` every instrumentation point returns after a
+single flag check.
+"""
+import abc
+import inspect
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans fast queries up to long crew tasks
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_enabled = None
+
+
+def enabled():
+    """Whether metrics are collected; read from METRICS_ENABLED on first use"""
+    global _enabled
+    if _enabled is None:
+        _enabled = os.environ.get("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+    return _enabled
+
+
+def set_enabled(value):
+    global _enabled
+    _enabled = bool(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Duplicate metric {metric.name!r}")
+            self._metrics.append(metric)
+
+    def render(self):
+        """Every metric in the Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        return "".join(metric.render() for metric in metrics)
+
+
+REGISTRY = Registry()
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric(abc.ABC):
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def labels(self, *values):
+        """The series for ``values``, one per label name, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+            lines.extend(child.samples(self.name, labels))
+        return "\n".join(lines) + "\n"
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A fresh series for one combination of label values"""
+
+
+def _sample(name, labels, value):
+    return f"{name}{{{','.join(labels)}}} {_format_value(value)}" if labels else f"{name} {_format_value(value)}"
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def samples(self, name, labels):
+        return [_sample(name, labels, self.value)]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            lines.append(_sample(f"{name}_bucket", labels + [f'le="{_format_value(bound)}"'], cumulative))
+        lines.append(_sample(f"{name}_sum", labels, total))
+        lines.append(_sample(f"{name}_count", labels, cumulative))
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+
+@contextmanager
+def timer(histogram, *labels, errors=None):
+    """Observe the duration of the block; count it in ``errors`` if it raises"""
+    if not enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        if errors is not None:
+            errors.labels(*labels).inc()
+        raise
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - start)
+
+
+def instrument_methods(cls, histogram, errors, exclude=()):
+    """Time every public method defined on ``cls``, labelled with the method name"""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or name in exclude or not inspect.isfunction(method):
+            continue
+        setattr(cls, name, _timed(method, histogram, errors, name))
+    return cls
+
+
+def _timed(method, histogram, errors, label):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        if not enabled():
+            return method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except BaseException:
+            errors.labels(label).inc()
+            raise
+        finally:
+            histogram.labels(label).observe(time.perf_counter() - start)
+    return wrapper
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host="0.0.0.0"):
+    """Serve /metrics from a daemon thread, for processes without the API"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+DB_QUERY_SECONDS = Histogram(
+    "recruitment_db_query_duration_seconds", "Duration of Database methods", ["query"]
+)
+DB_QUERY_ERRORS = Counter(
+    "recruitment_db_query_errors_total", "Database methods that raised", ["query"]
+)
+BROWSER_NAVIGATE_SECONDS = Histogram(
+    "recruitment_browser_navigate_duration_seconds", "Page load and readiness wait per navigation", ["outcome"]
+)
+BROWSER_WAIT_SECONDS = Histogram(
+    "recruitment_browser_wait_duration_seconds", "Page readiness waits, by operation and outcome", ["operation", "outcome"]
+)
+BROWSER_CHECKOUT_WAIT_SECONDS = Histogram(
+    "recruitment_browser_checkout_wait_seconds", "Time spent waiting for a browser session from the pool"
+)
+BROWSER_SESSIONS = Counter(
+    "recruitment_browser_sessions_total", "Browser sessions started, recycled and crashed", ["event"]
+)
+FIND_PEOPLE_SECONDS = Histogram(
+    "recruitment_linkedin_find_people_duration_seconds", "Loading and extracting one LinkedIn result page"
+)
+FIND_PEOPLE_ERRORS = Counter(
+    "recruitment_linkedin_find_people_errors_total", "LinkedIn result pages that failed to load or extract"
+)
+LINKEDIN_SEARCH_SECONDS = Histogram(
+    "recruitment_linkedin_search_duration_seconds", "LinkedInTool calls, by search cache outcome", ["outcome"]
+)
+LINKEDIN_SEARCH_ERRORS = Counter(
+    "recruitment_linkedin_search_errors_total", "LinkedInTool calls that failed"
+)
+DATABASE_TOOL_SECONDS = Histogram(
+    "recruitment_database_tool_duration_seconds", "DatabaseTool commands", ["command"]
+)
+DATABASE_TOOL_ERRORS = Counter(
+    "recruitment_database_tool_errors_total", "DatabaseTool commands that returned an error", ["command"]
+)
+CREW_TASK_SECONDS = Histogram(
+    "recruitment_crew_task_duration_seconds", "Crew task duration", ["task"]
+)
+CREW_TASK_ERRORS = Counter(
+    "recruitment_crew_task_errors_total", "Crew tasks that raised", ["task"]
+)
+JOBS_IN_FLIGHT = Gauge(
+    "recruitment_jobs_in_flight", "Jobs currently running in this process", ["kind"]
+)
+JOB_SECONDS = Histogram(
+    "recruitment_job_duration_seconds", "Job duration", ["kind", "status"]
+)
+JOBS_TOTAL = Counter(
+    "recruitment_jobs_total", "Jobs finished by this process", ["kind", "status"]
+)
@@ -0,0 +1,254 @@
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+def _connect():
+    return psycopg2.connect(
+        host=os.environ.get("POSTGRES_HOST", "localhost"),
+        database=os.environ.get("POSTGRES_DB", "pharmacy_tech_db"),
+        user=os.environ.get("POSTGRES_USER", "postgres"),
+        password=os.environ.get("POSTGRES_PASSWORD", "postgres"),
+        port=os.environ.get("POSTGRES_PORT", "5432")
+    )
+
+
+class ConnectionPool:
+    """Thread-safe pool of PostgreSQL connections.
+
+    Idle connections are handed out most-recently-used first so the hot set
+    stays small and the rest age out: anything idle longer than ``max_idle``
+    seconds is closed, down to ``min_size``. Connections idle longer than
+    ``health_check_after`` seconds are pinged before being handed out.
+    """
+
+    def __init__(self, min_size=1, max_size=10, max_idle=300.0, health_check_after=30.0,
+                 timeout=30.0, connect=_connect):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._connect = connect
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, returned_at), oldest on the left
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._evicted = 0
+        self._failed_health_checks = 0
+
+        for _ in range(min_size):
+            conn = self._connect()
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def getconn(self, timeout=None):
+        """Check a connection out of the pool, opening one if below ``max_size``"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        conn, returned_at = None, None
+        waited = timed_out = False
+        stale = []
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                stale.extend(self._evict_idle_locked())
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    timed_out = True
+                    break
+                waited = True
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+        self._close_all(stale)
+        if timed_out:
+            raise PoolTimeout(
+                f"No database connection available after {timeout:.1f}s "
+                f"(max_size={self.max_size})"
+            )
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif not self._is_healthy(conn, returned_at):
+                self._discard(conn)
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        wait = time.monotonic() - start
+        with self._cond:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            if waited:
+                self._waits += 1
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, rolling back any open transaction"""
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed:
+                self._size -= 1
+                close_conn = True
+            else:
+                self._idle.append((conn, time.monotonic()))
+                close_conn = False
+            self._cond.notify()
+
+        if close_conn and not conn.closed:
+            conn.close()
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close_all(idle)
+
+    def stats(self):
+        """Pool occupancy and checkout wait-time figures, for sizing the pool"""
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "waited_checkouts": self._waits,
+                "avg_wait_ms": (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+                "timeouts": self._timeouts,
+                "evicted": self._evicted,
+                "failed_health_checks": self._failed_health_checks,
+            }
+
+    def _evict_idle_locked(self):
+        # Must be called with the condition held; the caller closes the
+        # returned connections once the lock is released.
+        stale = []
+        if self.max_idle is None:
+            return stale
+        cutoff = time.monotonic() - self.max_idle
+        while self._idle and self._size > self.min_size and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            stale.append(conn)
+        return stale
+
+    def _is_healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+        if self.health_check_after is None or time.monotonic() - returned_at < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._cond:
+                self._failed_health_checks += 1
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _close_all(self, conns):
+        for conn in conns:
+            self._discard(conn)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use.
+
+    The pool is rebuilt after a fork so worker processes never share sockets
+    with their parent.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = ConnectionPool(
+                min_size=int(os.environ.get("POSTGRES_POOL_MIN_SIZE", "1")),
+                max_size=int(os.environ.get("POSTGRES_POOL_MAX_SIZE", "10")),
+                max_idle=float(os.environ.get("POSTGRES_POOL_MAX_IDLE", "300")),
+                health_check_after=float(os.environ.get("POSTGRES_POOL_HEALTH_CHECK_AFTER", "30")),
+                timeout=float(os.environ.get("POSTGRES_POOL_TIMEOUT", "30")),
+            )
+            _pool_pid = pid
+    return _pool
+
+
+def close_pool():
+    """Close the process-wide pool, if one was created"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool, _pool_pid = None, None
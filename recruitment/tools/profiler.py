@@ -0,0 +1,88 @@
+"""Sampling profiler for a single job.
+
+A background thread snapshots the stacks of the threads working on the job
+(those inside one of its trace spans) every ``interval`` seconds and counts
+them. ``folded()`` returns the counts in the folded-stack format read by
+flamegraph.pl, speedscope and inferno.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.01
+MAX_DEPTH = 128
+
+
+def profile_interval():
+    return float(os.environ.get("PROFILE_INTERVAL", str(DEFAULT_INTERVAL)))
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__") or os.path.basename(code.co_filename)
+    return f"{module}:{code.co_name}"
+
+
+def _fold(frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class SamplingProfiler:
+    """Sample the threads that ``trace`` reports as active, as a context manager"""
+
+    def __init__(self, trace, interval=DEFAULT_INTERVAL):
+        self.trace = trace
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="job-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.monotonic() - self.started
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            idents = [ident for ident in self.trace.active_threads() if ident != own]
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is not None:
+                    # Pool threads are numbered; group them by pool in the flame graph
+                    thread = names.get(ident, str(ident)).rsplit("_", 1)[0]
+                    self.stacks[f"{thread};{_fold(frame)}"] += 1
+            self.samples += 1
+            del frames
+
+    def folded(self):
+        """One ``frame;frame;... count`` line per distinct stack, most frequent first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def stats(self):
+        return {
+            "interval_s": self.interval,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "duration_s": round(self.elapsed, 3),
+        }
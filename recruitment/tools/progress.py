@@ -0,0 +1,85 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple
+
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+_current_job = ContextVar("current_job_id", default=None)
+_collected_candidates = ContextVar("collected_candidate_ids", default=())
+
+
+@contextmanager
+def job_context(job_id):
+    """Attribute progress events emitted inside the block to ``job_id``"""
+    token = _current_job.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+def current_job_id():
+    return _current_job.get()
+
+
+class CollectedCandidates(NamedTuple):
+    processed: set
+    needs_review: set
+    skipped: set
+
+
+@contextmanager
+def collect_candidates():
+    """Collect the ids of candidates handled by searches run inside the block.
+
+    ``processed`` holds the new or changed candidates, ``needs_review`` the
+    subset that pre-scoring left for the LLM analyzer and ``skipped`` those
+    unchanged since their last analysis. Blocks may nest; threads started
+    with a copy of the current context add to the same sets.
+    """
+    collected = CollectedCandidates(set(), set(), set())
+    token = _collected_candidates.set(_collected_candidates.get() + (collected,))
+    try:
+        yield collected
+    finally:
+        _collected_candidates.reset(token)
+
+
+def record_candidates(processed, needs_review=(), skipped=()):
+    for collected in _collected_candidates.get():
+        collected.processed.update(processed)
+        collected.needs_review.update(needs_review)
+        collected.skipped.update(skipped)
+
+
+def emit(stage, **data):
+    """Record a progress event for the current job, if there is one.
+
+    Progress reporting must never break the job itself, so failures are
+    logged and swallowed.
+    """
+    job_id = _current_job.get()
+    if job_id is None:
+        return
+    try:
+        with Database() as db:
+            db.add_job_event(job_id, stage, data)
+    except Exception:
+        logger.exception("Could not record %s event for job %s", stage, job_id)
+
+
+@contextmanager
+def stage(name, **data):
+    """Emit ``<name>_started`` and ``<name>_finished`` (with its duration) around a block"""
+    emit(f"{name}_started", **data)
+    start = time.monotonic()
+    try:
+        yield
+    except Exception as e:
+        emit(f"{name}_failed", duration_s=round(time.monotonic() - start, 3), error=str(e), **data)
+        raise
+    emit(f"{name}_finished", duration_s=round(time.monotonic() - start, 3), **data)
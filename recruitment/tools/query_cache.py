@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+
+class CachedResult(NamedTuple):
+    value: Any
+    etag: str
+    size: int
+
+
+class QueryCache:
+    """Memory-bounded LRU cache for read query results.
+
+    Entries are dropped when this process writes (``invalidate``) or when the
+    shared ``data_version`` counter maintained by database triggers moves
+    (``observe_version``), which covers writes made by other processes. A
+    result loaded while an invalidation happened is not stored, so a slow
+    query can never cache data older than the invalidation.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, version_check_interval=1.0):
+        self.max_bytes = max_bytes
+        self.version_check_interval = version_check_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._version = None
+        self._version_checked_at = float("-inf")
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def version_is_stale(self):
+        """Whether the shared data version should be re-read before serving from cache"""
+        return time.monotonic() - self._version_checked_at >= self.version_check_interval
+
+    def observe_version(self, version):
+        with self._lock:
+            self._version_checked_at = time.monotonic()
+            if version != self._version:
+                if self._version is not None:
+                    self._clear_locked()
+                self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._clear_locked()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key, value, generation):
+        """Store a result loaded at ``generation`` and return it with its ETag"""
+        encoded = json.dumps(value, default=str, sort_keys=True).encode()
+        entry = CachedResult(value, f'"{hashlib.sha1(encoded).hexdigest()}"', len(encoded))
+        with self._lock:
+            if generation != self._generation or entry.size > self.max_bytes:
+                return entry
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evictions += 1
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "data_version": self._version,
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+            }
+
+    def _clear_locked(self):
+        self._entries.clear()
+        self._bytes = 0
+        self._generation += 1
+        self._invalidations += 1
+
+
+_query_cache = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache():
+    """Return the process-wide query result cache"""
+    global _query_cache
+    with _query_cache_lock:
+        if _query_cache is None:
+            _query_cache = QueryCache(
+                max_bytes=int(os.environ.get("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+                version_check_interval=float(os.environ.get("QUERY_CACHE_VERSION_CHECK_INTERVAL", "1")),
+            )
+        return _query_cache
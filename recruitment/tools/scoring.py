@@ -0,0 +1,166 @@
+import os
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from .extractor import CERTIFICATION_KEYWORDS, SKILL_KEYWORDS
+
+# Rubric from analyze_candidates_task: experience 0-3, certifications 0-3,
+# skills 0-2, US location 0-2.
+
+# (minimum years, points), highest bracket first
+EXPERIENCE_BRACKETS = [(5, 3), (2, 2), (1, 1)]
+# Points when no years are stated but the headline names a pharmacy workplace
+WORKPLACE_ONLY_EXPERIENCE_POINTS = 1
+
+# Points per certification keyword; a candidate gets the best one
+CERTIFICATION_POINTS = {
+    "CPhT": 3,
+    "PTCB": 3,
+    "ExCPT": 3,
+    "NHA": 3,
+    "certified": 2,
+}
+
+MAX_SKILL_POINTS = 2
+US_LOCATION_POINTS = 2
+
+US_STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California",
+    "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "FL": "Florida", "GA": "Georgia",
+    "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois", "IN": "Indiana", "IA": "Iowa",
+    "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana", "ME": "Maine", "MD": "Maryland",
+    "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota", "MS": "Mississippi", "MO": "Missouri",
+    "MT": "Montana", "NE": "Nebraska", "NV": "Nevada", "NH": "New Hampshire", "NJ": "New Jersey",
+    "NM": "New Mexico", "NY": "New York", "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio",
+    "OK": "Oklahoma", "OR": "Oregon", "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina",
+    "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont",
+    "VA": "Virginia", "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+    "DC": "District of Columbia", "PR": "Puerto Rico",
+}
+
+NON_US_COUNTRIES = [
+    "Canada", "Mexico", "United Kingdom", "England", "Ireland", "India", "Pakistan", "Philippines",
+    "Nigeria", "Egypt", "Saudi Arabia", "United Arab Emirates", "Australia", "New Zealand", "Germany",
+]
+
+# Location classes
+LOCATION_UNKNOWN, LOCATION_NON_US, LOCATION_US = -1, 0, 1
+
+_US_PATTERN = re.compile(
+    r"\b(?:united states|usa|"
+    + "|".join(re.escape(name.lower()) for name in US_STATES.values())
+    + r")\b"
+)
+# Abbreviations only count after a comma ("Austin, TX") to avoid words like "in" or "me"
+_US_ABBREVIATION_PATTERN = re.compile(r",\s*(?:" + "|".join(US_STATES) + r")\b")
+_STATE_BY_NAME = {name.lower(): abbreviation for abbreviation, name in US_STATES.items()}
+_STATE_NAME_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(name) for name in sorted(_STATE_BY_NAME, key=len, reverse=True)) + r")\b"
+)
+_STATE_ABBREVIATION_PATTERN = re.compile(r",\s*(" + "|".join(US_STATES) + r")\b")
+_NON_US_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(c.lower()) for c in NON_US_COUNTRIES) + r")\b")
+
+_CERTIFICATION_INDEX = {k.lower(): i for i, k in enumerate(CERTIFICATION_KEYWORDS)}
+_CERTIFICATION_WEIGHTS = np.array(
+    [CERTIFICATION_POINTS.get(k, 0) for k in CERTIFICATION_KEYWORDS], dtype=np.float64
+)
+_SKILL_INDEX = {k.lower(): i for i, k in enumerate(SKILL_KEYWORDS)}
+
+
+class PreScores(NamedTuple):
+    """Rubric scores for a batch of candidates, one array element per candidate"""
+    scores: np.ndarray
+    experience: np.ndarray
+    certifications: np.ndarray
+    skills: np.ndarray
+    location: np.ndarray
+    needs_review: np.ndarray
+
+
+class ScoringSettings(NamedTuple):
+    enabled: bool
+    threshold: float
+    borderline: float
+
+
+def scoring_settings():
+    return ScoringSettings(
+        enabled=os.environ.get("PRESCORING", "true").lower() not in ("0", "false", "no"),
+        threshold=float(os.environ.get("PRESCORING_THRESHOLD", "7")),
+        borderline=float(os.environ.get("PRESCORING_BORDERLINE", "1")),
+    )
+
+
+@lru_cache(maxsize=16384)
+def classify_location(location):
+    """LOCATION_US, LOCATION_NON_US or LOCATION_UNKNOWN for a LinkedIn location string"""
+    text = location or ""
+    lowered = text.lower()
+    if _US_PATTERN.search(lowered) or _US_ABBREVIATION_PATTERN.search(text):
+        return LOCATION_US
+    if _NON_US_PATTERN.search(lowered):
+        return LOCATION_NON_US
+    return LOCATION_UNKNOWN
+
+
+@lru_cache(maxsize=16384)
+def location_state(location):
+    """Two-letter code of the US state named in a LinkedIn location string, if any"""
+    text = location or ""
+    # "City, State, Country": a part that is exactly a state wins over a state name inside a city name
+    for part in reversed(text.split(",")):
+        part = part.strip()
+        if part.lower() in _STATE_BY_NAME:
+            return _STATE_BY_NAME[part.lower()]
+        if part in US_STATES:
+            return part
+    match = _STATE_NAME_PATTERN.search(text.lower())
+    if match:
+        return _STATE_BY_NAME[match.group(1)]
+    match = _STATE_ABBREVIATION_PATTERN.search(text)
+    return match.group(1) if match else None
+
+
+def _hit_matrix(keyword_lists, index):
+    matrix = np.zeros((len(keyword_lists), len(index)), dtype=bool)
+    rows = np.array([row for row, keywords in enumerate(keyword_lists) for _ in keywords], dtype=np.intp)
+    cols = np.array([index[k] for keywords in keyword_lists for k in keywords], dtype=np.intp)
+    matrix[rows, cols] = True
+    return matrix
+
+
+def score_profiles(attributes, locations, threshold=7.0, borderline=1.0):
+    """Score a batch of extracted profiles against the analyzer rubric.
+
+    ``attributes`` are ``ProfileAttributes`` from the extractor and
+    ``locations`` the matching location strings. A candidate needs review by
+    the LLM analyzer when its location could not be classified or its total
+    is within ``borderline`` points of the outreach ``threshold``.
+    """
+    attributes = list(attributes)
+    years = np.array([np.nan if a.years is None else a.years for a in attributes], dtype=np.float64)
+    has_workplace = np.array([bool(a.workplace_keywords) for a in attributes], dtype=bool)
+    location = np.fromiter((classify_location(l) for l in locations), dtype=np.int8, count=len(attributes))
+
+    known_years = np.nan_to_num(years, nan=-1.0)
+    experience = np.select(
+        [known_years >= low for low, _ in EXPERIENCE_BRACKETS],
+        [points for _, points in EXPERIENCE_BRACKETS],
+        default=0,
+    ).astype(np.float64)
+    experience[np.isnan(years) & has_workplace] = WORKPLACE_ONLY_EXPERIENCE_POINTS
+
+    certification_hits = _hit_matrix([a.certification_keywords for a in attributes], _CERTIFICATION_INDEX)
+    certifications = (certification_hits * _CERTIFICATION_WEIGHTS).max(axis=1, initial=0.0)
+
+    skill_hits = _hit_matrix([a.skill_keywords for a in attributes], _SKILL_INDEX)
+    skills = np.minimum(skill_hits.sum(axis=1), MAX_SKILL_POINTS).astype(np.float64)
+
+    location_points = np.where(location == LOCATION_US, US_LOCATION_POINTS, 0).astype(np.float64)
+
+    scores = experience + certifications + skills + location_points
+    needs_review = (location == LOCATION_UNKNOWN) | (np.abs(scores - threshold) <= borderline)
+    return PreScores(scores, experience, certifications, skills, location_points, needs_review)
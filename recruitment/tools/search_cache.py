@@ -0,0 +1,113 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_criteria(criteria):
+    """Canonical form of search criteria: lowercased, comma-separated terms, sorted and deduplicated"""
+    terms = {re.sub(r"\s+", " ", term).strip() for term in criteria.lower().split(",")}
+    return ", ".join(sorted(term for term in terms if term))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SearchCache:
+    """TTL + LRU cache for search results with single-flight computation.
+
+    Concurrent ``get_or_compute`` calls for the same key share one in-flight
+    computation instead of each running it; failures are passed to every
+    waiter and are not cached.
+    """
+
+    def __init__(self, ttl=900.0, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+        self._evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """Return ``(value, outcome)`` where outcome is "hit", "shared" or "miss"."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[1], "hit"
+                del self._entries[key]
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self._misses += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, "shared"
+
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if call.error is None:
+                    self._entries[key] = (time.monotonic() + self.ttl, call.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self._evictions += 1
+            call.done.set()
+        return call.value, "miss"
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "in_flight": len(self._inflight),
+                "hits": self._hits,
+                "misses": self._misses,
+                "shared": self._shared,
+                "evictions": self._evictions,
+            }
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """Return the process-wide LinkedIn search cache"""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache(
+                ttl=float(os.environ.get("LINKEDIN_SEARCH_CACHE_TTL", "900")),
+                max_entries=int(os.environ.get("LINKEDIN_SEARCH_CACHE_SIZE", "256")),
+            )
+        return _search_cache
@@ -0,0 +1,35 @@
+import os
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Rough characters per token for English text when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(os.environ.get("TOKEN_ENCODING", "cl100k_base"))
+    except Exception:
+        # The encoding files are downloaded on first use and may be unreachable
+        return None
+
+
+def count_tokens(text):
+    """Number of LLM tokens in ``text``, estimated from its length without tiktoken"""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def token_counter_name():
+    """Which counter ``count_tokens`` uses, for reports"""
+    encoding = _encoding()
+    return f"tiktoken:{encoding.name}" if encoding is not None else f"estimate:{CHARS_PER_TOKEN}chars"
@@ -0,0 +1,198 @@
+"""Per-job span trees: where a job's wall-clock time went.
+
+A trace is started for each job; code running inside it opens spans
+(task, tool call, DB query, page navigation) that nest under whatever span
+is current in the context. Threads started with a copy of the context add
+to the same trace. Outside a trace every span call is a no-op.
+"""
+import inspect
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# Spans kept per trace; later ones are counted but dropped
+MAX_SPANS = 20000
+
+_current_trace = ContextVar("current_trace", default=None)
+_current_span = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("id", "parent", "name", "attributes", "start", "end", "error", "thread")
+
+    def __init__(self, span_id, parent, name, attributes):
+        self.id = span_id
+        self.parent = parent
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self.end = None
+        self.error = None
+        self.thread = threading.current_thread().name
+
+    def to_dict(self):
+        end = self.end if self.end is not None else time.time()
+        span = {
+            "id": self.id,
+            "parent_id": self.parent.id if self.parent is not None else None,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "end": round(end, 6),
+            "duration_s": round(end - self.start, 6),
+            "thread": self.thread,
+        }
+        if self.attributes:
+            span["attributes"] = self.attributes
+        if self.error is not None:
+            span["error"] = self.error
+        if self.end is None:
+            span["unfinished"] = True
+        return span
+
+
+class Trace:
+    def __init__(self, max_spans=MAX_SPANS):
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # thread ident -> number of open spans on it, read by the sampling profiler
+        self._active = {}
+
+    def open(self, name, parent, attributes):
+        span = Span(next(self._ids), parent, name, attributes)
+        ident = threading.get_ident()
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+            self._active[ident] = self._active.get(ident, 0) + 1
+        return span
+
+    def close(self, span, error=None):
+        span.end = time.time()
+        if error is not None:
+            span.error = error
+        ident = threading.get_ident()
+        with self._lock:
+            depth = self._active.get(ident, 0) - 1
+            if depth > 0:
+                self._active[ident] = depth
+            else:
+                self._active.pop(ident, None)
+
+    def active_threads(self):
+        """Idents of the threads currently inside a span of this trace"""
+        with self._lock:
+            return list(self._active)
+
+    def to_dict(self):
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+            dropped = self.dropped
+        return {"spans": spans, "dropped_spans": dropped, "summary": summarize(spans)}
+
+
+def summarize(spans):
+    """Total and self time per span name.
+
+    Self time is a span's duration minus that of its children (at least 0,
+    since parallel children can add up to more than their parent); for
+    ``task`` spans it is roughly the time spent waiting on the LLM.
+    """
+    child_time = {}
+    for span in spans:
+        if span["parent_id"] is not None:
+            child_time[span["parent_id"]] = child_time.get(span["parent_id"], 0.0) + span["duration_s"]
+    summary = {}
+    for span in spans:
+        entry = summary.setdefault(span["name"], {"count": 0, "total_s": 0.0, "self_s": 0.0})
+        entry["count"] += 1
+        entry["total_s"] += span["duration_s"]
+        entry["self_s"] += max(0.0, span["duration_s"] - child_time.get(span["id"], 0.0))
+    for entry in summary.values():
+        entry["total_s"] = round(entry["total_s"], 3)
+        entry["self_s"] = round(entry["self_s"], 3)
+    return summary
+
+
+@contextmanager
+def trace_job():
+    """Record the spans opened inside the block; yields the Trace"""
+    trace = Trace()
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name, **attributes):
+    """Record the block as a span under the current one, if a trace is active"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    current = trace.open(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        trace.close(current, error=f"{type(e).__name__}: {e}")
+        raise
+    else:
+        trace.close(current)
+    finally:
+        _current_span.reset(token)
+
+
+def start_span(name, **attributes):
+    """Open a span and make it current until ``end_span``.
+
+    For code that starts and finishes work in separate callbacks on the same
+    thread, where a ``with span(...)`` block does not fit.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    current = trace.open(name, _current_span.get(), attributes)
+    _current_span.set(current)
+    return current
+
+
+def end_span(current, error=None):
+    if current is None:
+        return
+    _current_trace.get().close(current, error)
+    _current_span.set(current.parent)
+
+
+def trace_methods(cls, name, attribute, exclude=()):
+    """Record every public method of ``cls`` as a ``name`` span, with the method name as ``attribute``"""
+    for method_name, method in list(vars(cls).items()):
+        if method_name.startswith("_") or method_name in exclude or not inspect.isfunction(method):
+            continue
+        setattr(cls, method_name, _traced(method, name, {attribute: method_name}))
+    return cls
+
+
+def _traced(method, name, attributes):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        if _current_trace.get() is None:
+            return method(*args, **kwargs)
+        with span(name, **attributes):
+            return method(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,241 @@
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from contextlib import nullcontext
+
+from .crew import TASKS, PharmacyTechnicianCrew
+from .tools.client import browser_stats, close_driver_pool
+from .tools import metrics
+from .tools.database import Database
+from .tools.linkedin import search_settings
+from .tools.pool import close_pool
+from .tools.profiler import SamplingProfiler, profile_interval
+from .tools.progress import collect_candidates, emit, job_context
+from .tools.search_cache import get_search_cache
+from .tools.tracing import end_span, span, start_span, trace_job
+
+logger = logging.getLogger(__name__)
+
+
+def track_task_progress(crew, task_names):
+    """Emit task_started/task_finished events as a sequential crew works through its tasks"""
+    tasks = crew.tasks
+    names = list(task_names) if len(task_names) == len(tasks) else [f"task_{i + 1}" for i in range(len(tasks))]
+    started = {}
+    spans = {}
+
+    def start(index):
+        started[index] = time.monotonic()
+        spans[index] = start_span("task", task=names[index])
+        emit("task_started", task=names[index])
+
+    def make_callback(index, previous_callback):
+        def callback(output):
+            end_span(spans.pop(index))
+            duration = time.monotonic() - started[index]
+            if metrics.enabled():
+                metrics.CREW_TASK_SECONDS.labels(names[index]).observe(duration)
+            emit("task_finished", task=names[index], duration_s=round(duration, 3))
+            if index + 1 < len(tasks):
+                start(index + 1)
+            if previous_callback:
+                previous_callback(output)
+        return callback
+
+    for index, task in enumerate(tasks):
+        task.callback = make_callback(index, task.callback)
+    return lambda: start(0) if tasks else None
+
+
+def run_linkedin_search(job_id, payload):
+    """Run the recruitment crew for one search job and return the job result"""
+    crew_base = PharmacyTechnicianCrew()
+    with collect_candidates() as collected, search_settings(
+        max_pages=payload.get("max_pages"),
+        page_concurrency=payload.get("page_concurrency"),
+        target_count=payload.get("target_count"),
+    ):
+        mode = payload.get("analysis_mode") or "sequential"
+        shards = None
+        with span("crew_kickoff", mode=mode):
+            if mode == "sharded":
+                results, shards = crew_base.kickoff_sharded(
+                    payload["criteria"],
+                    shard_size=payload.get("shard_size") or int(os.environ.get("ANALYSIS_SHARD_SIZE", "25")),
+                    concurrency=payload.get("analysis_concurrency") or int(os.environ.get("ANALYSIS_CONCURRENCY", "4")),
+                )
+            else:
+                crew = crew_base.crew()
+                track_task_progress(crew, TASKS.keys())()
+                results = crew.kickoff(inputs={"criteria": payload["criteria"]})
+    candidates = {
+        "processed": len(collected.processed),
+        "skipped": len(collected.skipped - collected.processed),
+        "sent_to_llm": len(collected.needs_review),
+    }
+    emit("analysis_counts", **candidates)
+    result = {
+        "message": "Search completed successfully",
+        "details": str(results),
+        "candidates": candidates,
+        "search_cache": get_search_cache().stats(),
+        "browser": browser_stats(),
+    }
+    if shards is not None:
+        result["shards"] = shards
+        if shards["failed"]:
+            result["message"] = f"Search completed; {len(shards['failed'])} of {shards['shards']} analysis shards failed"
+    return result
+
+
+JOB_HANDLERS = {
+    "search": run_linkedin_search,
+}
+
+
+class Worker:
+    """Claims queued jobs from PostgreSQL and runs them on a pool of threads.
+
+    Any number of worker processes can run next to the API; each claims jobs
+    with ``FOR UPDATE SKIP LOCKED`` and heartbeats the jobs it runs so jobs
+    orphaned by a crashed worker are requeued by the others.
+    """
+
+    def __init__(self, concurrency=1, poll_interval=2.0, heartbeat_interval=30.0, stale_after=180.0,
+                 max_attempts=2, name=None, handlers=None):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers = handlers or JOB_HANDLERS
+        self._stopping = threading.Event()
+        self._running = set()
+        self._running_lock = threading.Lock()
+
+    def run(self):
+        """Run until ``stop()`` is called, then let in-flight jobs finish"""
+        logger.info("Worker %s starting with concurrency %d", self.name, self.concurrency)
+        threads = [
+            threading.Thread(target=self._work_loop, name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        threads.append(threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            if not thread.daemon:
+                thread.join()
+        logger.info("Worker %s stopped", self.name)
+
+    def stop(self):
+        self._stopping.set()
+
+    def _work_loop(self):
+        while not self._stopping.is_set():
+            try:
+                with Database() as db:
+                    job = db.claim_job(self.name, self.handlers.keys())
+            except Exception:
+                logger.exception("Could not claim a job")
+                job = None
+            if job is None:
+                self._stopping.wait(self.poll_interval)
+                continue
+            self._execute(job)
+
+    def _execute(self, job):
+        job_id = job["id"]
+        with self._running_lock:
+            self._running.add(job_id)
+        logger.info("Running %s job %s (attempt %d)", job["kind"], job_id, job["attempts"])
+        if metrics.enabled():
+            metrics.JOBS_IN_FLIGHT.labels(job["kind"]).inc()
+        start = time.monotonic()
+        profiler = None
+        with job_context(job_id), trace_job() as trace, span("job", kind=job["kind"], attempt=job["attempts"]):
+            emit("job_started", kind=job["kind"], worker=self.name, attempt=job["attempts"])
+            if job["payload"].get("profile"):
+                profiler = SamplingProfiler(trace, profile_interval())
+            try:
+                with profiler or nullcontext():
+                    result = self.handlers[job["kind"]](job_id, job["payload"])
+                status = "completed"
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                result = {"error": str(e), "traceback": traceback.format_exc()}
+                status = "failed"
+            finally:
+                with self._running_lock:
+                    self._running.discard(job_id)
+            duration = time.monotonic() - start
+            if metrics.enabled():
+                metrics.JOBS_IN_FLIGHT.labels(job["kind"]).dec()
+                metrics.JOBS_TOTAL.labels(job["kind"], status).inc()
+                metrics.JOB_SECONDS.labels(job["kind"], status).observe(duration)
+            emit(f"job_{status}", duration_s=round(duration, 3))
+
+        if profiler is not None:
+            result["profile"] = profiler.stats()
+        try:
+            with Database() as db:
+                db.finish_job(job_id, status, result, trace=trace.to_dict(),
+                              profile=profiler.folded() if profiler is not None else None)
+        except Exception:
+            logger.exception("Could not record the result of job %s", job_id)
+
+    def _heartbeat_loop(self):
+        while not self._stopping.wait(self.heartbeat_interval):
+            with self._running_lock:
+                running = list(self._running)
+            try:
+                with Database() as db:
+                    db.heartbeat_jobs(running)
+                    requeued = db.requeue_stale_jobs(self.stale_after, self.max_attempts)
+                if requeued:
+                    logger.warning("Recovered %d jobs from unresponsive workers", requeued)
+            except Exception:
+                logger.exception("Job heartbeat failed")
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run recruitment crew jobs queued by the API")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("WORKER_CONCURRENCY", "1")),
+                        help="jobs run in parallel by this process")
+    parser.add_argument("--poll-interval", type=float, default=float(os.environ.get("WORKER_POLL_INTERVAL", "2")),
+                        help="seconds between polls when the queue is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    metrics_port = os.environ.get("WORKER_METRICS_PORT")
+    if metrics_port and metrics.enabled():
+        metrics.start_http_server(int(metrics_port))
+        logger.info("Serving metrics on port %s", metrics_port)
+    worker = Worker(
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        heartbeat_interval=float(os.environ.get("WORKER_HEARTBEAT_INTERVAL", "30")),
+        stale_after=float(os.environ.get("WORKER_STALE_AFTER", "180")),
+        max_attempts=int(os.environ.get("WORKER_MAX_ATTEMPTS", "2")),
+    )
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    try:
+        worker.run()
+    finally:
+        # Jobs have finished; without this every pooled Firefox and geckodriver outlives the worker
+        close_driver_pool()
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
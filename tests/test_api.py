@@ -0,0 +1,40 @@
+import uuid
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from recruitment import api
+
+
+class FinishingJobDatabase:
+    """Job whose worker records a last event and finishes just before the stream checks its status"""
+
+    def __init__(self, job_id):
+        self.job = {"id": job_id, "status": "running"}
+        self.events = [self.event(1, "search_started")]
+        self.status_checks = 0
+
+    @staticmethod
+    def event(event_id, stage):
+        return {"id": event_id, "stage": stage, "data": {}, "created_at": datetime(2024, 1, 1)}
+
+    async def get_job(self, job_id):
+        self.status_checks += 1
+        # The first check is the 404 check before streaming starts
+        if self.status_checks == 2:
+            self.events.append(self.event(2, "job_completed"))
+            self.job["status"] = "completed"
+        return dict(self.job)
+
+    async def get_job_events(self, job_id, after_id):
+        return [event for event in self.events if event["id"] > after_id]
+
+
+def test_job_events_sent_before_end(monkeypatch):
+    job_id = uuid.uuid4()
+    monkeypatch.setattr(api, "db", FinishingJobDatabase(job_id))
+
+    response = TestClient(api.app).get(f"/api/jobs/{job_id}/events")
+
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["search_started", "job_completed", "end"]
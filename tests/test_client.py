@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+from recruitment.tools.client import NO_RESULTS_SELECTOR, RESULT_CARD_SELECTOR, search_people
+
+
+class StubDriver:
+    """Serves result pages from ``pages``: page number -> list of cards, or an exception to raise"""
+
+    def __init__(self, pages, loads):
+        self.pages = pages
+        self.loads = loads
+        self.page = None
+
+    def navigate(self, url, wait_for=None, timeout=None):
+        self.page = int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+        self.loads.append(self.page)
+        content = self.pages.get(self.page, [])
+        if isinstance(content, Exception):
+            raise content
+        # Like Driver.navigate: ready once the selector matches cards or the no-results message
+        if content:
+            return RESULT_CARD_SELECTOR in wait_for
+        return NO_RESULTS_SELECTOR in wait_for
+
+    def execute_script(self, script, *args):
+        return self.pages.get(self.page, [])
+
+
+class StubPool:
+    def __init__(self, pages):
+        self.pages = pages
+        self.loads = []
+
+    @contextmanager
+    def session(self, timeout=None):
+        yield StubDriver(self.pages, self.loads)
+
+
+def cards(page, count=2):
+    return [
+        {"name": f"Tech {page}-{i}", "position": "CPhT", "location": "Austin, Texas",
+         "profile_link": f"https://www.linkedin.com/in/tech-{page}-{i}"}
+        for i in range(count)
+    ]
+
+
+def test_walk_stops_at_empty_page():
+    pool = StubPool({1: cards(1), 2: cards(2)})
+
+    results = list(search_people("pharmacy", max_pages=5, pool=pool))
+
+    assert [page for page, _ in results] == [1, 2]
+    # Page 3 shows no results: loaded once, and nothing after it
+    assert pool.loads == [1, 2, 3]
+
+
+def test_failed_page_is_skipped():
+    pool = StubPool({1: cards(1), 2: RuntimeError("browser crashed"), 3: cards(3)})
+
+    results = list(search_people("pharmacy", max_pages=5, pool=pool))
+
+    assert [page for page, _ in results] == [1, 3]
+    assert pool.loads == [1, 2, 3, 4]